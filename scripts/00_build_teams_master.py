@@ -54,70 +54,86 @@ def load_name_maps():
     for p in [SRC["name_map"], SRC["alias_overrides"]]:
         df = safe_read_csv(p, ["raw","canonical"])
         if not df.empty and {"raw","canonical"}.issubset(df.columns):
-            for r in df.itertuples(index=False):
-                raw = str(getattr(r, "raw")).strip()
-                can = str(getattr(r, "canonical")).strip()
-                if raw and can:
-                    nm[raw] = can  # overrides win because alias_overrides loaded last
+            raw = df["raw"].astype(str).str.strip()
+            can = df["canonical"].astype(str).str.strip()
+            ok = raw.ne("") & can.ne("")
+            nm.update(zip(raw[ok], can[ok]))  # overrides win because alias_overrides loaded last
     return nm
 
 def apply_map(series, nm):
     if series is None: 
         return series
-    s = series.astype(str).str.strip()
-    return s.map(lambda x: nm.get(x, x))
+    # strip/map each distinct raw name once, then broadcast back through the codes
+    codes, uniq = pd.factorize(series, use_na_sentinel=False)
+    s = pd.Series(uniq, dtype=object).astype(str).str.strip()
+    s = s.map(nm).fillna(s)
+    return pd.Series(s.to_numpy()[codes], index=series.index, name=series.name)
+
+# Columns each source is read with; every file is read once and shared by both passes
+SRC_COLS = {
+    "hybrid":      ["team","xgd90_hybrid"],
+    "understat":   ["team"],
+    "sb_totals":   ["team"],
+    "sb_features": ["team","psxg_minus_goals_sb","setpiece_xg_sb","openplay_xg_sb"],
+    "fbref":       ["team"],
+    "hist":        ["home_team","away_team"],
+    "upcoming":    ["date","home_team","away_team"],
+}
+
+def load_sources():
+    return {k: safe_read_csv(SRC[k], cols) for k, cols in SRC_COLS.items()}
 
-def gather_team_universe(nm):
+def gather_team_universe(nm, src):
     names = []
 
     # Hybrid xG
-    hyb = safe_read_csv(SRC["hybrid"], ["team"])
+    hyb = src["hybrid"]
     if not hyb.empty and "team" in hyb.columns:
-        names.append(apply_map(hyb["team"], nm))
+        names.append(hyb["team"])
 
     # Understat
-    ust = safe_read_csv(SRC["understat"], ["team"])
+    ust = src["understat"]
     if not ust.empty and "team" in ust.columns:
-        names.append(apply_map(ust["team"], nm))
+        names.append(ust["team"])
 
     # StatsBomb totals
-    sbt = safe_read_csv(SRC["sb_totals"], ["team"])
+    sbt = src["sb_totals"]
     if not sbt.empty and "team" in sbt.columns:
-        names.append(apply_map(sbt["team"], nm))
+        names.append(sbt["team"])
 
     # StatsBomb features
-    sbf = safe_read_csv(SRC["sb_features"], ["team"])
+    sbf = src["sb_features"]
     if not sbf.empty and "team" in sbf.columns:
-        names.append(apply_map(sbf["team"], nm))
+        names.append(sbf["team"])
 
     # FBref teams
-    fbr = safe_read_csv(SRC["fbref"], ["team"])
+    fbr = src["fbref"]
     if not fbr.empty and "team" in fbr.columns:
-        names.append(apply_map(fbr["team"], nm))
+        names.append(fbr["team"])
 
     # HIST (home/away)
-    hist = safe_read_csv(SRC["hist"], ["home_team","away_team"])
+    hist = src["hist"]
     if not hist.empty:
-        names.append(apply_map(hist["home_team"], nm))
-        names.append(apply_map(hist["away_team"], nm))
+        names.append(hist["home_team"])
+        names.append(hist["away_team"])
 
     # UPCOMING (home/away)
-    upc = safe_read_csv(SRC["upcoming"], ["date","home_team","away_team"])
+    upc = src["upcoming"]
     if not upc.empty:
-        names.append(apply_map(upc["home_team"], nm))
-        names.append(apply_map(upc["away_team"], nm))
+        names.append(upc["home_team"])
+        names.append(upc["away_team"])
 
     if not names:
         return pd.DataFrame(columns=["team"])
 
-    # Concatenate, drop NA, strip, deduplicate
-    allnames = pd.concat(names, ignore_index=True).dropna()
+    # Concatenate, map names in one pass over all sources, drop NA, strip, deduplicate
+    allnames = apply_map(pd.concat(names, ignore_index=True), nm).dropna()
     allnames = allnames.astype(str).str.strip()
     allnames = pd.Series(allnames.unique(), name="team").to_frame()
     allnames = allnames[allnames["team"] != ""].reset_index(drop=True)
     return allnames
 
-def derive_priors(allteams, nm):
+def derive_priors(allteams, nm, src):
     # Defaults
     pri = allteams.copy()
     pri["gk_rating"] = 0.75
@@ -125,9 +141,9 @@ def derive_priors(allteams, nm):
     pri["crowd_index"] = 0.70
 
     # StatsBomb features (xA, psxg_minus_goals, setpiece vs openplay) → derive GK & set-piece priors
-    sbf = safe_read_csv(SRC["sb_features"], ["team","psxg_minus_goals_sb","setpiece_xg_sb","openplay_xg_sb"])
+    sbf = src["sb_features"]
     if not sbf.empty:
-        sbf["team"] = apply_map(sbf["team"], nm)
+        sbf = sbf.assign(team=apply_map(sbf["team"], nm))
         sbf = (sbf.groupby("team", as_index=False)
                     .agg(psxg=("psxg_minus_goals_sb","mean"),
                          sp=("setpiece_xg_sb","mean"),
@@ -140,23 +156,21 @@ def derive_priors(allteams, nm):
         sbf["setpiece_rating"] = [clamp(0.55 + 0.25*float(x), 0.50, 0.90) for x in share]
         sbf = sbf[["team","gk_rating","setpiece_rating"]]
 
-        pri = pri.merge(sbf, on="team", how="left", suffixes=("","_sb"))
+        pri = pri.merge(sbf, on="team", how="left", suffixes=("","_sb"), validate="m:1")
         # prefer SB-derived columns where present
         for c in ["gk_rating","setpiece_rating"]:
-            pri[c] = np.where(pri[f"{c}_sb"].notna(), pri[f"{c}_sb"], pri[c])
-            pri.drop(columns=[f"{c}_sb"], inplace=True)
+            pri[c] = pri.pop(f"{c}_sb").combine_first(pri[c])
 
     # If you want, fold hybrid strength for minor nudges (optional, gentle)
-    hyb = safe_read_csv(SRC["hybrid"], ["team","xgd90_hybrid"])
+    hyb = src["hybrid"]
     if not hyb.empty:
-        hyb["team"] = apply_map(hyb["team"], nm)
+        hyb = hyb.assign(team=apply_map(hyb["team"], nm))
         # small bonus for very strong teams to set-piece rating (they likely draw more set-piece xG)
         hyb["sp_bonus"] = hyb["xgd90_hybrid"].map(lambda v: 0.02*float(v) if pd.notna(v) else 0.0)
         hyb["sp_bonus"] = hyb["sp_bonus"].clip(-0.03, 0.03)
-        pri = pri.merge(hyb[["team","sp_bonus"]], on="team", how="left")
-        pri["setpiece_rating"] = pri["setpiece_rating"] + pri["sp_bonus"].fillna(0.0)
+        sp_bonus = pri["team"].map(hyb.drop_duplicates("team").set_index("team")["sp_bonus"])
+        pri["setpiece_rating"] = pri["setpiece_rating"] + sp_bonus.fillna(0.0)
         pri["setpiece_rating"] = pri["setpiece_rating"].map(lambda v: clamp(v, 0.50, 0.90))
-        pri.drop(columns=["sp_bonus"], inplace=True, errors="ignore")
 
     # Final clamps
     pri["gk_rating"] = pri["gk_rating"].map(lambda v: clamp(v, 0.55, 0.92))
@@ -170,7 +184,8 @@ def main():
 
     # 1) Load name maps (main + overrides) and build canonical team list
     name_map = load_name_maps()
-    allteams = gather_team_universe(name_map)
+    src = load_sources()
+    allteams = gather_team_universe(name_map, src)
     if allteams.empty:
         # still write a valid file (headers only)
         pd.DataFrame(columns=["team","gk_rating","setpiece_rating","crowd_index"]).to_csv(OUT, index=False)
@@ -178,7 +193,7 @@ def main():
         return
 
     # 2) Derive priors safely (no duplicate index ops)
-    pri = derive_priors(allteams, name_map)
+    pri = derive_priors(allteams, name_map, src)
 
     # 3) Save
     pri.to_csv(OUT, index=False)
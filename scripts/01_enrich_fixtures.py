@@ -22,6 +22,8 @@ import os
 import numpy as np
 import pandas as pd
 
+from util_io import write_csv
+
 DATA = "data"
 UP_PATH   = os.path.join(DATA, "UPCOMING_7D_enriched.csv")
 LINEUPS   = os.path.join(DATA, "lineups.csv")
@@ -29,6 +31,9 @@ REFS      = os.path.join(DATA, "referee_tendencies.csv")
 STADIUM   = os.path.join(DATA, "stadium_crowd.csv")
 TRAVEL    = os.path.join(DATA, "travel_matrix.csv")
 
+# travel_matrix.csv headers are matched case-insensitively
+TRAVEL_COLS = {"home_team","away_team","travel_km_home","home_travel_km","travel_km_away","away_travel_km"}
+
 SAFE_DEFAULTS = {
     "home_injury_index": 0.30, "away_injury_index": 0.30,
     "ref_pen_rate": 0.30,
@@ -36,11 +41,18 @@ SAFE_DEFAULTS = {
     "home_travel_km": 0.0, "away_travel_km": 200.0,
 }
 
-def safe_read(path, cols=None):
+def safe_read(path, cols=None, usecols=None):
+    """usecols: column names (absent ones are skipped) or a predicate on the header names."""
     if not os.path.exists(path):
         return pd.DataFrame(columns=cols or [])
     try:
-        df = pd.read_csv(path)
+        if usecols is not None:
+            keep = usecols if callable(usecols) else set(usecols).__contains__
+            usecols = [c for c in pd.read_csv(path, nrows=0).columns if keep(c)]
+        try:
+            df = pd.read_csv(path, usecols=usecols, engine="pyarrow")
+        except (ImportError, ValueError):
+            df = pd.read_csv(path, usecols=usecols)
         if cols:
             for c in cols:
                 if c not in df.columns:
@@ -49,11 +61,23 @@ def safe_read(path, cols=None):
     except Exception:
         return pd.DataFrame(columns=cols or [])
 
+def unique_on(df, keys):
+    """First row per key, so every reference table joins many-to-one against the fixtures."""
+    return df.drop_duplicates(keys) if set(keys).issubset(df.columns) else df
+
+def with_values(df, cols):
+    """Rows that can fill at least one of cols; empty when nothing could, so the join is skipped."""
+    have = [c for c in cols if c in df.columns]
+    return df.dropna(subset=have, how="all") if have else df.iloc[0:0]
+
+def coalesce_into(up, col, new):
+    """Non-null values of new (row-aligned with up) override up[col]; one combine_first, no temp column."""
+    up[col] = pd.Series(np.asarray(new), index=up.index).combine_first(up[col])
+
 def ensure_cols(df, col_defaults: dict):
-    for c, v in col_defaults.items():
-        if c not in df.columns:
-            df[c] = v
-    return df
+    # all missing defaults in one assign rather than one column insert each
+    missing = {c: v for c, v in col_defaults.items() if c not in df.columns}
+    return df.assign(**missing) if missing else df
 
 def main():
     if not os.path.exists(UP_PATH):
@@ -66,53 +90,52 @@ def main():
         up["league"] = "GLOBAL"
     if "fixture_id" not in up.columns:
         # mirror 01_enrich_fixtures generation if needed
-        up["fixture_id"] = up.apply(
-            lambda r: f"{str(r.get('date','NA')).replace('-','')}__{str(r.get('home_team','NA')).strip().lower().replace(' ','_')}__vs__{str(r.get('away_team','NA')).strip().lower().replace(' ','_')}",
-            axis=1
-        )
+        part = lambda c: up[c].astype(str) if c in up.columns else pd.Series("NA", index=up.index)
+        slug = lambda s: s.str.strip().str.lower().str.replace(" ", "_", regex=False)
+        up["fixture_id"] = (part("date").str.replace("-", "", regex=False)
+                            + "__" + slug(part("home_team")) + "__vs__" + slug(part("away_team")))
 
     # Defaults so downstream never breaks
     up = ensure_cols(up, SAFE_DEFAULTS)
 
     # --- Lineups / injuries (optional) ---
     # Expect columns: fixture_id, home_injury_index, away_injury_index (0..1)
-    ln = safe_read(LINEUPS, ["fixture_id","home_injury_index","away_injury_index"])
+    ln_cols = ["fixture_id","home_injury_index","away_injury_index"]
+    ln = unique_on(safe_read(LINEUPS, ln_cols, usecols=ln_cols), ["fixture_id"])
+    ln = with_values(ln, ["home_injury_index","away_injury_index"])
     if not ln.empty and "fixture_id" in ln.columns:
-        ln = ln.drop_duplicates("fixture_id")
-        up = up.merge(ln, on="fixture_id", how="left", suffixes=("", "_from_lineup"))
+        # one keyed lookup serves both sides; no merge, no suffix columns
+        lk = ln.set_index("fixture_id").reindex(up["fixture_id"])
         for c in ["home_injury_index","away_injury_index"]:
-            if f"{c}_from_lineup" in up.columns:
-                up[c] = np.where(up[f"{c}_from_lineup"].notna(), up[f"{c}_from_lineup"], up[c])
-                up.drop(columns=[f"{c}_from_lineup"], inplace=True, errors="ignore")
+            coalesce_into(up, c, lk[c])
 
     # --- Referee tendencies (optional) ---
     # Expect columns: fixture_id or referee_name; we prioritize fixture_id
-    rf = safe_read(REFS)
+    rf = unique_on(safe_read(REFS, usecols=["fixture_id","ref_pen_rate"]), ["fixture_id"])
+    rf = with_values(rf, ["ref_pen_rate"])
     if not rf.empty:
         if "fixture_id" in rf.columns:
             # direct join
             keep = ["fixture_id"]
             if "ref_pen_rate" in rf.columns: keep.append("ref_pen_rate")
-            up = up.merge(rf[keep].drop_duplicates("fixture_id"), on="fixture_id", how="left", suffixes=("", "_rf"))
+            up = up.merge(rf[keep], on="fixture_id", how="left", suffixes=("", "_rf"), validate="m:1")
             if "ref_pen_rate_rf" in up.columns:
-                up["ref_pen_rate"] = np.where(up["ref_pen_rate_rf"].notna(), up["ref_pen_rate_rf"], up["ref_pen_rate"])
-                up.drop(columns=["ref_pen_rate_rf"], inplace=True, errors="ignore")
+                coalesce_into(up, "ref_pen_rate", up.pop("ref_pen_rate_rf"))
 
     # --- Stadium crowd (optional) ---
     # Expect columns: home_team, crowd_index (0..1) or venue + mapping
-    sc = safe_read(STADIUM)
+    sc = unique_on(safe_read(STADIUM, usecols=["home_team","crowd_index"]), ["home_team"])
+    sc = with_values(sc, ["crowd_index"])
     if not sc.empty:
         # try to join on home_team
         if "home_team" in up.columns and "home_team" in sc.columns and "crowd_index" in sc.columns:
-            sc_ht = sc[["home_team","crowd_index"]].drop_duplicates("home_team")
-            up = up.merge(sc_ht, on="home_team", how="left", suffixes=("", "_st"))
-            if "crowd_index_st" in up.columns:
-                up["crowd_index"] = np.where(up["crowd_index_st"].notna(), up["crowd_index_st"], up["crowd_index"])
-                up.drop(columns=["crowd_index_st"], inplace=True, errors="ignore")
+            # single-key lookup against a small table: map, no merge/suffix cleanup
+            sc_ht = sc.set_index("home_team")["crowd_index"]
+            coalesce_into(up, "crowd_index", up["home_team"].map(sc_ht))
 
     # --- Travel distances (optional) ---
     # Expect columns: home_team, away_team, travel_km_home, travel_km_away
-    tv = safe_read(TRAVEL)
+    tv = safe_read(TRAVEL, usecols=lambda c: c.lower() in TRAVEL_COLS)
     if not tv.empty:
         cols = {c.lower(): c for c in tv.columns}
         hh = cols.get("home_team", "home_team") if "home_team" in cols or "home_team" in tv.columns else None
@@ -124,11 +147,12 @@ def main():
             t2 = tv[keep].drop_duplicates([hh, aa]).rename(columns={
                 hh:"home_team", aa:"away_team", th:"home_travel_km", ta:"away_travel_km"
             })
-            up = up.merge(t2, on=["home_team","away_team"], how="left", suffixes=("", "_tv"))
-            for c in ["home_travel_km","away_travel_km"]:
-                if f"{c}_tv" in up.columns:
-                    up[c] = np.where(up[f"{c}_tv"].notna(), up[f"{c}_tv"], up[c])
-                    up.drop(columns=[f"{c}_tv"], inplace=True, errors="ignore")
+            t2 = with_values(t2, ["home_travel_km","away_travel_km"])
+            if not t2.empty:
+                up = up.merge(t2, on=["home_team","away_team"], how="left", suffixes=("", "_tv"), validate="m:1")
+                for c in ["home_travel_km","away_travel_km"]:
+                    if f"{c}_tv" in up.columns:
+                        coalesce_into(up, c, up.pop(f"{c}_tv"))
 
     # Final safe types / ordering
     if "date" in up.columns:
@@ -138,7 +162,11 @@ def main():
         except Exception:
             pass
 
-    up.to_csv(UP_PATH, index=False)
+    # context indexes/distances are low-precision: float32 halves them in memory and on the write
+    f32 = [c for c in SAFE_DEFAULTS if pd.api.types.is_numeric_dtype(up[c])]
+    up[f32] = up[f32].astype("float32")
+
+    write_csv(up, UP_PATH)
     print(f"[OK] enrich_features: wrote {UP_PATH} rows={len(up)}")
 
 if __name__ == "__main__":
@@ -40,7 +40,7 @@ if fx.empty and not fx_upc.empty:
 # league normalization/filter
 name_map = {}
 if not lmap.empty and {"raw","canonical"}.issubset(lmap.columns):
-    name_map = {str(r.raw).strip(): str(r.canonical).strip() for _, r in lmap.iterrows()}
+    name_map = dict(zip(lmap["raw"].astype(str).str.strip(), lmap["canonical"].astype(str).str.strip()))
 def norm_league(s):
     if pd.isna(s): return s
     s = str(s).strip()
@@ -65,8 +65,8 @@ def main():
     df["implied_goals_1x2"] = implied_goals_from_1x2(df["pH"], df["pD"], df["pA"])
     df["delta_goals"] = np.abs(df["implied_goals_1x2"] - (df["p_over"]*3.1 + (1.0 - df["p_over"])*2.1))
 
-    df["flag_goals_vs_totals"] = ((df["delta_goals"] > 0.4) & df["p_over"].notna()).astype(int)
-    df["flag_over_vs_btts"]   = ((df["p_over"] > 0.58) & (df["p_btts_yes"] < 0.50)).fillna(0).astype(int)
+    df["flag_goals_vs_totals"] = ((df["delta_goals"] > 0.4) & df["p_over"].notna()).astype("int8")
+    df["flag_over_vs_btts"]   = ((df["p_over"] > 0.58) & (df["p_btts_yes"] < 0.50)).astype("int8")
     df["flag_favorite_vs_handicap"] = 0  # placeholder until spread is added
 
     out = df[[
@@ -2,7 +2,8 @@
 """
 engineer_extra_variables.py
 
-Adds engineered variables into data/UPCOMING_7D_enriched.csv:
+Adds engineered variables into data/UPCOMING_7D_enriched.csv
+(also written as a zstd parquet sidecar, data/UPCOMING_7D_enriched.parquet):
 
 Windows (domestic-only):
   - PPG: last3, last5, last7, last10, season-to-date
@@ -28,7 +29,8 @@ Other context handled elsewhere:
 import os
 import numpy as np
 import pandas as pd
-from datetime import timedelta
+
+from util_io import read_table, write_table
 
 DATA = "data"
 UP   = os.path.join(DATA, "UPCOMING_7D_enriched.csv")
@@ -75,63 +77,96 @@ def safe_read(path, cols=None):
             if c not in df.columns: df[c] = np.nan
     return df
 
+def read_up() -> pd.DataFrame:
+    """UPCOMING via util_io.read_table (parquet sidecar when at least as new as the CSV); empty when absent/unreadable."""
+    if not os.path.exists(UP):
+        return pd.DataFrame()
+    try:
+        return read_table(UP)
+    except Exception:
+        return pd.DataFrame()
+
+def engine_dtype(col: str):
+    """Compact dtype for an engineered column (None → leave as is)."""
+    if col.endswith("_ppg") or "_ppg_momentum_" in col or col.endswith("_days_since_last"):
+        return np.float32
+    if "_matches_" in col:
+        return np.int16
+    if col.endswith("_midweek_last7") or col == "engine_is_neutral":
+        return np.int8
+    return None
+
+def write_outputs(up: pd.DataFrame):
+    """CSV stays the contract for downstream steps; parquet sidecar is the fast path."""
+    write_table(up, UP)
+
 def to_long_hist(H: pd.DataFrame) -> pd.DataFrame:
     H = H.copy()
     H["date"] = pd.to_datetime(H["date"], errors="coerce")
     H = H.dropna(subset=["date"]).sort_values("date")
     if "league" not in H.columns:
         H["league"] = "GLOBAL"
-    # long format for PPG / congestion
-    h = H[["date","home_team","home_goals","away_goals","league"]].rename(
-        columns={"home_team":"team","home_goals":"gf","away_goals":"ga"})
-    a = H[["date","away_team","home_goals","away_goals","league"]].rename(
-        columns={"away_team":"team","away_goals":"gf","home_goals":"ga"})
-    long = pd.concat([h,a], ignore_index=True)
-    long["pts"] = 0
-    long.loc[long["gf"]>long["ga"], "pts"] = 3
-    long.loc[long["gf"]==long["ga"], "pts"] = 1
+    # long format for PPG / congestion: home rows then away rows, built once
+    hg, ag = H["home_goals"].to_numpy(), H["away_goals"].to_numpy()
+    team = np.concatenate([H["home_team"].to_numpy(dtype=object), H["away_team"].to_numpy(dtype=object)])
+    date = np.concatenate([H["date"].to_numpy(), H["date"].to_numpy()])
+    team_codes, _ = pd.factorize(team, sort=True)
+    order = np.lexsort((date, team_codes))
+    long = pd.DataFrame({
+        "date":   date[order],
+        "team":   team[order],
+        "gf":     np.concatenate([hg, ag])[order],
+        "ga":     np.concatenate([ag, hg])[order],
+        "league": np.concatenate([H["league"].to_numpy(dtype=object)] * 2)[order],
+    })
+    gf, ga = long["gf"].to_numpy(), long["ga"].to_numpy()
+    long["pts"] = np.where(gf > ga, 3, np.where(gf == ga, 1, 0)).astype(np.int8)
     long["is_uefa"] = long["league"].astype(str).apply(is_uefa).astype(int)
-    return long.sort_values(["team","date"])
-
-def rolling_ppg(long: pd.DataFrame, team: str, n: int, domestic_only: bool) -> float:
-    g = long[long["team"]==team]
-    if domestic_only:
-        g = g[g["is_uefa"]==0]
-    if g.empty: return np.nan
-    g = g.sort_values("date")
-    return g["pts"].rolling(n, min_periods=1).mean().iloc[-1]
-
-def season_ppg(long: pd.DataFrame, team: str, date_ref: pd.Timestamp, domestic_only: bool) -> float:
-    g = long[long["team"]==team]
-    if domestic_only:
-        g = g[g["is_uefa"]==0]
-    if g.empty or pd.isna(date_ref): return np.nan
-    season = pd.Timestamp(date_ref).year
-    g_season = g[g["date"].dt.year==season]
-    return g_season["pts"].mean() if not g_season.empty else np.nan
-
-def congestion_counts(long_all: pd.DataFrame, team: str, date_ref: pd.Timestamp, days: int) -> int:
-    if pd.isna(date_ref): return 0
-    start = pd.Timestamp(date_ref) - timedelta(days=days)
-    g = long_all[(long_all["team"]==team) & (long_all["date"] < date_ref) & (long_all["date"] >= start)]
-    return int(len(g))
-
-def days_since_last(long_all: pd.DataFrame, team: str, date_ref: pd.Timestamp) -> float:
-    if pd.isna(date_ref): return np.nan
-    g = long_all[(long_all["team"]==team) & (long_all["date"] < date_ref)]
-    if g.empty: return np.nan
-    return float((pd.Timestamp(date_ref) - g["date"].iloc[-1]).days)
-
-def midweek_last7(long_all: pd.DataFrame, team: str, date_ref: pd.Timestamp) -> int:
-    if pd.isna(date_ref): return 0
-    start = pd.Timestamp(date_ref) - timedelta(days=7)
-    g = long_all[(long_all["team"]==team) & (long_all["date"] < date_ref) & (long_all["date"] >= start)]
-    if g.empty: return 0
-    # Tue(1)/Wed(2)/Thu(3)
-    return int(any(d in (1,2,3) for d in g["date"].dt.weekday))
+    return long
+
+DAY_NS = 86_400 * 10**9
+
+def team_arrays(codes: np.ndarray, dates: np.ndarray, pts: np.ndarray, years: np.ndarray, n_codes: int) -> list:
+    """Per-team (dates_ns, pts, years) slices indexed by team code; rows must be grouped by team, date-sorted."""
+    out = [None] * n_codes
+    if len(codes) == 0:
+        return out
+    cuts = np.flatnonzero(np.diff(codes)) + 1
+    for s, e in zip(np.r_[0, cuts], np.r_[cuts, len(codes)]):
+        if codes[s] >= 0:
+            out[codes[s]] = (dates[s:e], pts[s:e], years[s:e])
+    return out
+
+def rolling_ppg(th, n: int) -> float:
+    if th is None: return np.nan
+    return float(th[1][-n:].mean())
+
+def season_ppg(th, date_ref, year_ref) -> float:
+    if th is None or date_ref is None: return np.nan
+    pts = th[1][th[2] == year_ref]
+    return float(pts.mean()) if len(pts) else np.nan
+
+def congestion_counts(th, date_ref, days: int) -> int:
+    if th is None or date_ref is None: return 0
+    d = th[0]
+    return int(np.searchsorted(d, date_ref) - np.searchsorted(d, date_ref - days * DAY_NS))
+
+def days_since_last(th, date_ref) -> float:
+    if th is None or date_ref is None: return np.nan
+    hi = np.searchsorted(th[0], date_ref)
+    if hi == 0: return np.nan
+    return float((date_ref - th[0][hi - 1]) // DAY_NS)
+
+def midweek_last7(th, date_ref) -> int:
+    if th is None or date_ref is None: return 0
+    d = th[0]
+    w = d[np.searchsorted(d, date_ref - 7 * DAY_NS):np.searchsorted(d, date_ref)]
+    # Tue(1)/Wed(2)/Thu(3); 1970-01-01 was a Thursday
+    wd = (w // DAY_NS + 3) % 7
+    return int(((wd >= 1) & (wd <= 3)).any())
 
 def main():
-    up = safe_read(UP)
+    up = read_up()
     if up.empty:
         print(f"[WARN] {UP} missing/empty; nothing to engineer.")
         return
@@ -159,32 +194,52 @@ def main():
             "engine_is_neutral","engine_comp_stage"
         ]
         for c in cols: up[c] = np.nan
-        up.to_csv(UP, index=False)
+        write_outputs(up)
         print(f"[OK] engineered variables (empty HIST) → {UP}")
         return
 
     long = to_long_hist(H)             # all competitions
-    long_dom = long[long["is_uefa"]==0]  # domestic only
+
+    # factorize teams once; every per-team lookup below is a list index by int code
+    n_up = len(up)
+    codes, uniques = pd.factorize(pd.concat([up["home_team"], up["away_team"], long["team"]], ignore_index=True))
+    home_codes, away_codes, long_codes = codes[:n_up], codes[n_up:2*n_up], codes[2*n_up:]
+    l_dates = long["date"].to_numpy(dtype="datetime64[ns]").view("i8")
+    l_pts   = long["pts"].to_numpy()
+    l_years = long["date"].dt.year.to_numpy()
+    dom     = long["is_uefa"].to_numpy() == 0
+    all_by_team = team_arrays(long_codes, l_dates, l_pts, l_years, len(uniques))  # all competitions
+    dom_by_team = team_arrays(long_codes[dom], l_dates[dom], l_pts[dom], l_years[dom], len(uniques))  # domestic only
+
+    up_dates = up["date"].to_numpy(dtype="datetime64[ns]")
+    up_nat   = np.isnat(up_dates)
+    up_dates = up_dates.view("i8")
+    up_years = up["date"].dt.year.to_numpy()
+    leagues  = up["league"].to_numpy(dtype=object)
 
     # compute windows/domestic + congestion/all comps per fixture
     ecols = {}
-    for r in up.itertuples(index=False):
-        dt = getattr(r, "date")
-        ht = getattr(r, "home_team")
-        at = getattr(r, "away_team")
+    for i in range(n_up):
+        dt = None if up_nat[i] else up_dates[i]
+        yr = up_years[i]
+        hc, ac = home_codes[i], away_codes[i]
+        h_dom = dom_by_team[hc] if hc >= 0 else None
+        a_dom = dom_by_team[ac] if ac >= 0 else None
+        h_all = all_by_team[hc] if hc >= 0 else None
+        a_all = all_by_team[ac] if ac >= 0 else None
 
         # windows (domestic-only)
-        h3  = rolling_ppg(long_dom, ht, 3,  domestic_only=True)
-        h5  = rolling_ppg(long_dom, ht, 5,  domestic_only=True)
-        h7  = rolling_ppg(long_dom, ht, 7,  domestic_only=True)
-        h10 = rolling_ppg(long_dom, ht, 10, domestic_only=True)
-        hs  = season_ppg(long_dom, ht, dt,  domestic_only=True)
-
-        a3  = rolling_ppg(long_dom, at, 3,  domestic_only=True)
-        a5  = rolling_ppg(long_dom, at, 5,  domestic_only=True)
-        a7  = rolling_ppg(long_dom, at, 7,  domestic_only=True)
-        a10 = rolling_ppg(long_dom, at, 10, domestic_only=True)
-        as_ = season_ppg(long_dom, at, dt,  domestic_only=True)
+        h3  = rolling_ppg(h_dom, 3)
+        h5  = rolling_ppg(h_dom, 5)
+        h7  = rolling_ppg(h_dom, 7)
+        h10 = rolling_ppg(h_dom, 10)
+        hs  = season_ppg(h_dom, dt, yr)
+
+        a3  = rolling_ppg(a_dom, 3)
+        a5  = rolling_ppg(a_dom, 5)
+        a7  = rolling_ppg(a_dom, 7)
+        a10 = rolling_ppg(a_dom, 10)
+        as_ = season_ppg(a_dom, dt, yr)
 
         # momentum
         h_m3_10 = (h3 - h10) if np.isfinite(h3) and np.isfinite(h10) else np.nan
@@ -193,19 +248,19 @@ def main():
         a_m5_s  = (a5 - as_) if np.isfinite(a5) and np.isfinite(as_) else np.nan
 
         # congestion (all competitions)
-        h3d  = congestion_counts(long, ht, dt, 3)
-        h7d  = congestion_counts(long, ht, dt, 7)
-        h10d = congestion_counts(long, ht, dt, 10)
-        h14d = congestion_counts(long, ht, dt, 14)
-        a3d  = congestion_counts(long, at, dt, 3)
-        a7d  = congestion_counts(long, at, dt, 7)
-        a10d = congestion_counts(long, at, dt, 10)
-        a14d = congestion_counts(long, at, dt, 14)
-
-        hds  = days_since_last(long, ht, dt)
-        ads  = days_since_last(long, at, dt)
-        hmw7 = midweek_last7(long, ht, dt)
-        amw7 = midweek_last7(long, at, dt)
+        h3d  = congestion_counts(h_all, dt, 3)
+        h7d  = congestion_counts(h_all, dt, 7)
+        h10d = congestion_counts(h_all, dt, 10)
+        h14d = congestion_counts(h_all, dt, 14)
+        a3d  = congestion_counts(a_all, dt, 3)
+        a7d  = congestion_counts(a_all, dt, 7)
+        a10d = congestion_counts(a_all, dt, 10)
+        a14d = congestion_counts(a_all, dt, 14)
+
+        hds  = days_since_last(h_all, dt)
+        ads  = days_since_last(a_all, dt)
+        hmw7 = midweek_last7(h_all, dt)
+        amw7 = midweek_last7(a_all, dt)
 
         # write home vars
         ecols.setdefault("engine_home_last3_ppg", []).append(h3)
@@ -238,15 +293,16 @@ def main():
         ecols.setdefault("engine_away_midweek_last7", []).append(amw7)
 
         # NEW tournament-aware flags
-        league = getattr(r, "league")
+        league = leagues[i]
         ecols.setdefault("engine_is_neutral", []).append(is_neutral_from_league(league))
         ecols.setdefault("engine_comp_stage", []).append(stage_from_league(league))
 
-    # merge back to UPCOMING
+    # merge back to UPCOMING (PPG/day gaps fit float32, counts int16, flags int8)
     for k, v in ecols.items():
-        up[k] = v
+        dtype = engine_dtype(k)
+        up[k] = np.asarray(v, dtype=dtype) if dtype else v
 
-    up.to_csv(UP, index=False)
+    write_outputs(up)
     print(f"[OK] engineered variables merged → {UP}")
 
 if __name__ == "__main__":
@@ -8,14 +8,17 @@ Counter sparse tournament data by injecting priors derived from your existing so
   - Diffs: engine_lsi_diff (home_dom - away_dom), engine_tsi_diff (home - away)
   - UEFA experience: matches last 365/730 days, shrunk win-rate (prior 1/3, alpha=5)
 
-Writes into: data/UPCOMING_7D_enriched.csv
+Writes into: data/UPCOMING_7D_enriched.csv (+ .parquet sidecar, read back in preference when fresher)
 Inputs: data/UPCOMING_7D_enriched.csv, data/sd_538_spi.csv, data/HIST_matches.csv
 """
 
 import os
+import re
 import numpy as np
 import pandas as pd
 
+from util_io import read_table, write_table
+
 DATA = "data"
 UP   = os.path.join(DATA, "UPCOMING_7D_enriched.csv")
 SPI  = os.path.join(DATA, "sd_538_spi.csv")
@@ -27,15 +30,58 @@ UEFA_TOKENS = [
     "conference league","uefa europa conference","uecl","super cup"
 ]
 
+# per-team features (prefixed engine_home_/engine_away_) and the final column order
+TEAM_FEATS = ["dom_league","league_strength","team_spi",
+              "euro_matches_365","euro_matches_730","euro_wr_shrunk"]
+ENGINE_COLS = [
+    "engine_home_dom_league","engine_away_dom_league",
+    "engine_home_league_strength","engine_away_league_strength",
+    "engine_home_team_spi","engine_away_team_spi",
+    "engine_lsi_diff","engine_tsi_diff",
+    "engine_home_euro_matches_365","engine_home_euro_matches_730","engine_home_euro_wr_shrunk",
+    "engine_away_euro_matches_365","engine_away_euro_matches_730","engine_away_euro_wr_shrunk",
+]
+ENGINE_NUM_COLS = [c for c in ENGINE_COLS if not c.endswith("_dom_league")]
+
+UEFA_RE = re.compile("|".join(map(re.escape, UEFA_TOKENS)), re.IGNORECASE)
+
 def is_uefa(league):
     if not isinstance(league, str): return False
-    s = league.lower()
-    return any(tok in s for tok in UEFA_TOKENS)
-
-def safe_read(path, cols=None):
+    return UEFA_RE.search(league) is not None
+
+def uefa_mask(league: pd.Series) -> pd.Series:
+    """Vectorized is_uefa over a league column: the regex runs once per distinct league, then broadcasts by code."""
+    codes, uniques = pd.factorize(league)
+    hit = pd.Index(uniques).astype(str).str.contains(UEFA_RE, na=False)
+    return pd.Series(np.append(hit, False)[codes], index=league.index)   # code -1 (missing) → appended False
+
+def hist_uefa_mask(hist_df: pd.DataFrame) -> pd.Series:
+    """UEFA row mask for HIST, reusing the _is_uefa column from prepare_hist()."""
+    if "_is_uefa" in hist_df.columns:
+        return hist_df["_is_uefa"]
+    return uefa_mask(hist_df["league"])
+
+HIST_COLS  = ["date","home_team","away_team","home_goals","away_goals","league"]
+HIST_DTYPE = {"home_goals":"float32","away_goals":"float32"}
+# every SPI header parse_spi may pick up (team aliases, off/def aliases, league); matched case-insensitively
+SPI_COLS = {"team","squad","team_name","name","off","offense","spi_off","def","defense","spi_def","league"}
+
+def safe_read(path, cols=None, usecols=None, dtype=None):
+    """
+    Read CSV or return an empty frame; a list usecols tolerates absent names (cols backfills them).
+    A full read goes through util_io.read_table (the .parquet sidecar when at least as new as the CSV).
+    """
     if not os.path.exists(path): return pd.DataFrame(columns=cols or [])
+    keep = (lambda c, wanted=set(usecols): c in wanted) if isinstance(usecols, (list, set)) else usecols
     try:
-        df = pd.read_csv(path)
+        if usecols is None and dtype is None:
+            df = read_table(path)
+        else:
+            try:
+                df = pd.read_csv(path, usecols=keep, dtype=dtype)
+            except ValueError:
+                if dtype is None: raise
+                df = pd.read_csv(path, usecols=keep)   # non-numeric junk in a typed column; coerce later
     except Exception:
         return pd.DataFrame(columns=cols or [])
     if cols:
@@ -43,6 +89,28 @@ def safe_read(path, cols=None):
             if c not in df.columns: df[c] = np.nan
     return df
 
+def shared_categories(*cols) -> pd.CategoricalDtype:
+    """One CategoricalDtype over the non-null values of several key columns, so merges join on int codes."""
+    vals = pd.concat([c.astype(object) for c in cols], ignore_index=True).dropna().unique()
+    return pd.CategoricalDtype(vals)
+
+def group_mean(keys: pd.Series, values, key_name: str, val_name: str) -> pd.DataFrame:
+    """NaN-skipping mean of values per key (groupby(...).mean() semantics) as two bincounts over factorized keys."""
+    codes, uniques = pd.factorize(keys)
+    v = np.asarray(values, dtype="float64")
+    ok = (codes >= 0) & ~np.isnan(v)
+    k = len(uniques)
+    tot = np.bincount(codes[ok], weights=v[ok], minlength=k)
+    cnt = np.bincount(codes[ok], minlength=k)
+    mean = np.divide(tot, cnt, out=np.full(k, np.nan), where=cnt > 0)
+    return pd.DataFrame({key_name: uniques, val_name: mean})
+
+def to_float32(col: pd.Series) -> np.ndarray:
+    """float32 values; only object columns pay for a to_numeric coerce (read_csv types clean ones)."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.to_numpy(dtype="float32")
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype="float32")
+
 def parse_spi(spi_df: pd.DataFrame):
     """Return (team_spi, league_spi) with:
        team_spi:   team, tsi
@@ -52,7 +120,7 @@ def parse_spi(spi_df: pd.DataFrame):
         return (pd.DataFrame(columns=["team","tsi"]),
                 pd.DataFrame(columns=["league","lsi"]))
 
-    df = spi_df.copy()
+    df = spi_df
 
     # Standardize team column
     if "team" not in df.columns:
@@ -69,19 +137,51 @@ def parse_spi(spi_df: pd.DataFrame):
         return (pd.DataFrame(columns=["team","tsi"]),
                 pd.DataFrame(columns=["league","lsi"]))
 
-    df["_tsi"] = pd.to_numeric(df[off_col], errors="coerce") - pd.to_numeric(df[def_col], errors="coerce")
+    df = df.assign(_tsi=to_float32(df[off_col]) - to_float32(df[def_col]))
 
     # TSI per team
-    team_spi  = df.groupby("team", as_index=False)["_tsi"].mean().rename(columns={"_tsi":"tsi"})
+    team_spi  = group_mean(df["team"], df["_tsi"], "team", "tsi")
 
     # LSI per league if SPI supplies a 'league' column
     if "league" in df.columns:
-        league_spi = df.groupby("league", as_index=False)["_tsi"].mean().rename(columns={"_tsi":"lsi"})
+        league_spi = group_mean(df["league"], df["_tsi"], "league", "lsi")
     else:
         league_spi = pd.DataFrame(columns=["league","lsi"])
 
     return team_spi, league_spi
 
+def prepare_hist(hist: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive once what every HIST helper shares: parsed dates (ISO from upstream
+    writers, NaT rows dropped), numeric float32 goals, the _is_uefa mask and
+    per-side win flags (_home_win / _away_win).
+    """
+    hist["date"] = pd.to_datetime(hist["date"], format="ISO8601", errors="coerce")
+    hist = hist.dropna(subset=["date"])
+    hg = pd.to_numeric(hist["home_goals"], errors="coerce").astype("float32")
+    ag = pd.to_numeric(hist["away_goals"], errors="coerce").astype("float32")
+    return hist.assign(home_goals=hg, away_goals=ag,
+                       _is_uefa=uefa_mask(hist["league"]),
+                       _home_win=(hg > ag).astype("int8"),
+                       _away_win=(ag > hg).astype("int8"))
+
+def to_long(df: pd.DataFrame, **sides) -> pd.DataFrame:
+    """
+    Home rows then away rows in one 2N frame: each kwarg is name=(home, away), where
+    home/away are column names or arrays. Halves are slice-filled into one
+    preallocated buffer per column (no concat copy / reindex).
+    """
+    n = len(df)
+    out = {}
+    for name, (h, a) in sides.items():
+        h = df[h].to_numpy() if isinstance(h, str) else h
+        a = df[a].to_numpy() if isinstance(a, str) else a
+        buf = np.empty(2*n, dtype=np.result_type(h.dtype, a.dtype))
+        buf[:n] = h
+        buf[n:] = a
+        out[name] = buf
+    return pd.DataFrame(out)
+
 def build_domestic_mapping(hist_df: pd.DataFrame):
     """
     Map each team -> most-recent domestic league using HIST (exclude UEFA).
@@ -90,94 +190,93 @@ def build_domestic_mapping(hist_df: pd.DataFrame):
     if hist_df.empty:
         return pd.DataFrame(columns=["team","dom_league"])
 
-    df = hist_df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-    if "league" not in df.columns: df["league"] = "GLOBAL"
+    df = hist_df if "league" in hist_df.columns else hist_df.assign(league="GLOBAL")
 
     # Exclude UEFA competitions -> domestic only
-    df = df[~df["league"].astype(str).apply(is_uefa)]
+    df = df[~hist_uefa_mask(df)]
     if df.empty:
         return pd.DataFrame(columns=["team","dom_league"])
 
     # Build long per-team rows with league label
-    h = df[["date","home_team","league"]].rename(columns={"home_team":"team"})
-    a = df[["date","away_team","league"]].rename(columns={"away_team":"team"})
-    long = pd.concat([h,a], ignore_index=True).sort_values("date")
-
-    # For each team choose most recent league appearance (or mode)
-    # We'll take the last seen league value (most recent) per team.
-    idx = long.groupby("team")["date"].idxmax()
-    recent = long.loc[idx, ["team","league"]].rename(columns={"league":"dom_league"}).reset_index(drop=True)
+    long = to_long(df, date=("date","date"), team=("home_team","away_team"),
+                   league=("league","league")).dropna(subset=["team"])
+
+    # For each team take the last seen league value (most recent): one sort + hash dedup.
+    recent = (long.sort_values("date", kind="stable")
+                  .drop_duplicates("team", keep="last")[["team","league"]]
+                  .rename(columns={"league":"dom_league"})
+                  .reset_index(drop=True))
     return recent
 
-def build_uefa_experience(hist_df: pd.DataFrame):
+def build_uefa_experience(hist_df: pd.DataFrame, teams_needed=None):
     """Return per-team UEFA experience:
        team, euro_matches_365, euro_matches_730, euro_wr_shrunk
+    teams_needed (optional set) limits the per-team reduction; the 365/730-day
+    cutoffs still come from the latest UEFA match overall.
     """
     if hist_df.empty or "league" not in hist_df.columns:
         return pd.DataFrame(columns=["team","euro_matches_365","euro_matches_730","euro_wr_shrunk"])
 
-    df = hist_df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-    df = df[df["league"].astype(str).apply(is_uefa)]
+    df = hist_df
+    df = df[hist_uefa_mask(df)]
     if df.empty:
         return pd.DataFrame(columns=["team","euro_matches_365","euro_matches_730","euro_wr_shrunk"])
 
-    h = df[["date","home_team","home_goals","away_goals"]].rename(
-        columns={"home_team":"team","home_goals":"gf","away_goals":"ga"})
-    a = df[["date","away_team","home_goals","away_goals"]].rename(
-        columns={"away_team":"team","away_goals":"gf","home_goals":"ga"})
-    long = pd.concat([h,a], ignore_index=True)
-    long["win"] = (pd.to_numeric(long["gf"], errors="coerce") > pd.to_numeric(long["ga"], errors="coerce")).astype(int)
+    long = to_long(df, date=("date","date"), team=("home_team","away_team"),
+                   win=("_home_win","_away_win"))
 
     max_date = long["date"].max()
     cutoff_365 = max_date - pd.Timedelta(days=365)
     cutoff_730 = max_date - pd.Timedelta(days=730)
 
-    def agg(team_df):
-        m365 = int((team_df["date"] >= cutoff_365).sum())
-        m730 = int((team_df["date"] >= cutoff_730).sum())
-        n = len(team_df)
-        wr = float(team_df["win"].mean()) if n>0 else np.nan
-        p0, alpha = 1.0/3.0, 5.0
-        wr_shrunk = (wr*n + p0*alpha) / (n + alpha) if n>0 and np.isfinite(wr) else p0
-        return pd.Series({"euro_matches_365":m365, "euro_matches_730":m730, "euro_wr_shrunk":wr_shrunk})
-
-    exp = long.groupby("team", as_index=False).apply(agg)
-    if isinstance(exp.index, pd.MultiIndex):
-        exp = exp.reset_index(level=0, drop=True).reset_index().rename(columns={"index":"team"})
-    return exp
+    if teams_needed is not None:
+        long = long[long["team"].isin(teams_needed)]
+
+    # grouped reduction as flat bincounts over factorized team codes (one O(N) pass each)
+    codes, teams = pd.factorize(long["team"])
+    ok = codes >= 0
+    codes, dates, win = codes[ok], long["date"].to_numpy()[ok], long["win"].to_numpy()[ok]
+    k = len(teams)
+    n    = np.bincount(codes, minlength=k)
+    wins = np.bincount(codes, weights=win, minlength=k)
+    p0, alpha = 1.0/3.0, 5.0
+    return pd.DataFrame({
+        "team": teams,
+        "euro_matches_365": np.bincount(codes[dates >= cutoff_365.to_datetime64()], minlength=k),
+        "euro_matches_730": np.bincount(codes[dates >= cutoff_730.to_datetime64()], minlength=k),
+        "euro_wr_shrunk": (wins + p0*alpha) / (n + alpha),
+    })
 
 def fallback_lsi_from_hist(hist_df: pd.DataFrame):
     """If SPI doesn't give a usable league LSI, proxy from HIST domestic goal diff."""
     if hist_df.empty:
         return pd.DataFrame(columns=["league","lsi"])
-    df = hist_df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-    if "league" not in df.columns: df["league"] = "GLOBAL"
+    df = hist_df if "league" in hist_df.columns else hist_df.assign(league="GLOBAL")
     # domestic only
-    df = df[~df["league"].astype(str).apply(is_uefa)]
+    df = df[~hist_uefa_mask(df)]
     if df.empty:
         return pd.DataFrame(columns=["league","lsi"])
-    h = df[["league","home_team","home_goals","away_goals"]].rename(
-        columns={"home_team":"team","home_goals":"gf","away_goals":"ga"})
-    a = df[["league","away_team","home_goals","away_goals"]].rename(
-        columns={"away_team":"team","away_goals":"gf","home_goals":"ga"})
-    long = pd.concat([h,a], ignore_index=True)
-    long["gd"] = pd.to_numeric(long["gf"], errors="coerce") - pd.to_numeric(long["ga"], errors="coerce")
-    return long.groupby("league", as_index=False)["gd"].mean().rename(columns={"gd":"lsi"})
+    gd = (df["home_goals"] - df["away_goals"]).to_numpy()
+    long = to_long(df, league=("league","league"), gd=(gd, -gd))
+    return group_mean(long["league"], long["gd"], "league", "lsi")
+
+def inputs_unchanged() -> bool:
+    """UP written at or after the last change to SPI/HIST (a missing input has nothing newer to offer)."""
+    t = os.path.getmtime(UP)
+    return all(os.path.getmtime(p) <= t for p in (SPI, HIST) if os.path.exists(p))
 
 def main():
     up = safe_read(UP)
     if up.empty:
         print(f"[WARN] {UP} missing/empty; nothing to engineer."); return
     if "league" not in up.columns: up["league"] = "GLOBAL"
+    if all(c in up.columns for c in ENGINE_COLS) and up[ENGINE_COLS].notna().all().all() and inputs_unchanged():
+        print(f"[OK] tournament extras already complete in {UP} and newer than SPI/HIST; skipping (rows={len(up)})"); return
+    teams_needed = set(up["home_team"].dropna()) | set(up["away_team"].dropna())
 
-    spi_df = safe_read(SPI)
-    hist   = safe_read(HIST, ["date","home_team","away_team","home_goals","away_goals","league"])
+    spi_df = safe_read(SPI, usecols=lambda c: c.lower() in SPI_COLS)
+    hist   = safe_read(HIST, HIST_COLS, usecols=HIST_COLS, dtype=HIST_DTYPE)
+    hist   = prepare_hist(hist)
 
     # Build TSI & LSI from SPI (and fallback)
     team_spi, league_spi_spi = parse_spi(spi_df)
@@ -190,8 +289,7 @@ def main():
     #  (2) proxy from HIST domestic goal-diff
     if league_spi_spi.empty and (not team_spi.empty) and (not dom_map.empty):
         tmp = team_spi.merge(dom_map, left_on="team", right_on="team", how="inner")
-        league_spi_by_team = tmp.groupby("dom_league", as_index=False)["tsi"].mean() \
-                                .rename(columns={"dom_league":"league","tsi":"lsi"})
+        league_spi_by_team = group_mean(tmp["dom_league"], tmp["tsi"], "league", "lsi")
         league_spi = league_spi_by_team
     else:
         league_spi = league_spi_spi
@@ -200,74 +298,47 @@ def main():
         league_spi = fallback_lsi_from_hist(hist)
 
     # UEFA experience (home/away)
-    exp = build_uefa_experience(hist)
+    exp = build_uefa_experience(hist, teams_needed)
+
+    # Shared categorical keys: every team/league merge below hashes int codes, not strings.
+    # Only the join-side copies are categorical; up's own columns (and so the CSV/sidecar) keep plain strings.
+    team_dtype = shared_categories(up["home_team"], up["away_team"], dom_map["team"], team_spi["team"], exp["team"])
+    league_dtype = shared_categories(dom_map["dom_league"], league_spi["league"])
+    for frame in (dom_map, team_spi, exp):
+        frame["team"] = frame["team"].astype(team_dtype)
+    dom_map["dom_league"] = dom_map["dom_league"].astype(league_dtype)
+    league_spi["league"] = league_spi["league"].astype(league_dtype)
+
+    # One per-team feature table (dom league → league strength via lsi lookup, SPI, UEFA experience),
+    # joined twice onto UPCOMING instead of a chain of home/away merges.
+    feats = (dom_map.merge(team_spi.rename(columns={"tsi":"team_spi"}), on="team", how="outer")
+                    .merge(exp, on="team", how="outer")
+                    .set_index("team"))
+    lsi_map = league_spi.set_index("league")["lsi"]
+    feats["league_strength"] = feats["dom_league"].map(lsi_map).astype(float)
+    feats["dom_league"] = feats["dom_league"].astype(object)   # written out as engine_*_dom_league
+    feats = feats[TEAM_FEATS]
 
     # Merge into UPCOMING
-    df = up.copy()
-
-    # Merge domestic league for home/away
-    if not dom_map.empty:
-        df = df.merge(dom_map.rename(columns={"team":"home_team","dom_league":"engine_home_dom_league"}),
-                      on="home_team", how="left")
-        df = df.merge(dom_map.rename(columns={"team":"away_team","dom_league":"engine_away_dom_league"}),
-                      on="away_team", how="left")
-    else:
-        df["engine_home_dom_league"] = np.nan
-        df["engine_away_dom_league"] = np.nan
-
-    # Merge league strength for domestic leagues
-    if not league_spi.empty:
-        lsi_home = league_spi.rename(columns={"league":"engine_home_dom_league",
-                                              "lsi":"engine_home_league_strength"})
-        lsi_away = league_spi.rename(columns={"league":"engine_away_dom_league",
-                                              "lsi":"engine_away_league_strength"})
-        df = df.merge(lsi_home, on="engine_home_dom_league", how="left")
-        df = df.merge(lsi_away, on="engine_away_dom_league", how="left")
-    else:
-        df["engine_home_league_strength"] = np.nan
-        df["engine_away_league_strength"] = np.nan
-
-    # Team strength from SPI
-    if not team_spi.empty:
-        hspi = team_spi.rename(columns={"team":"home_team","tsi":"engine_home_team_spi"})
-        aspi = team_spi.rename(columns={"team":"away_team","tsi":"engine_away_team_spi"})
-        df = df.merge(hspi, on="home_team", how="left").merge(aspi, on="away_team", how="left")
-    else:
-        df["engine_home_team_spi"] = np.nan
-        df["engine_away_team_spi"] = np.nan
+    df = up.drop(columns=[c for c in ENGINE_COLS if c in up.columns]) \
+           .assign(_home_key=up["home_team"].astype(team_dtype), _away_key=up["away_team"].astype(team_dtype))
+    df = df.join(feats.add_prefix("engine_home_"), on="_home_key") \
+           .join(feats.add_prefix("engine_away_"), on="_away_key") \
+           .drop(columns=["_home_key","_away_key"])
 
     # Diffs
-    df["engine_lsi_diff"] = df.get("engine_home_league_strength", np.nan) - df.get("engine_away_league_strength", np.nan)
-    df["engine_tsi_diff"] = df.get("engine_home_team_spi", np.nan)        - df.get("engine_away_team_spi", np.nan)
-
-    # UEFA experience onto home/away
-    if not exp.empty:
-        hexp = exp.rename(columns={
-            "team":"home_team",
-            "euro_matches_365":"engine_home_euro_matches_365",
-            "euro_matches_730":"engine_home_euro_matches_730",
-            "euro_wr_shrunk":"engine_home_euro_wr_shrunk"
-        })
-        aexp = exp.rename(columns={
-            "team":"away_team",
-            "euro_matches_365":"engine_away_euro_matches_365",
-            "euro_matches_730":"engine_away_euro_matches_730",
-            "euro_wr_shrunk":"engine_away_euro_wr_shrunk"
-        })
-        df = df.merge(hexp, on="home_team", how="left").merge(aexp, on="away_team", how="left")
-    else:
-        df["engine_home_euro_matches_365"] = np.nan
-        df["engine_home_euro_matches_730"] = np.nan
-        df["engine_home_euro_wr_shrunk"]   = np.nan
-        df["engine_away_euro_matches_365"] = np.nan
-        df["engine_away_euro_matches_730"] = np.nan
-        df["engine_away_euro_wr_shrunk"]   = np.nan
+    df["engine_lsi_diff"] = df["engine_home_league_strength"] - df["engine_away_league_strength"]
+    df["engine_tsi_diff"] = df["engine_home_team_spi"]        - df["engine_away_team_spi"]
+    # numeric engine columns as one float32, column-major block (contiguous per-column scans/writes)
+    arr = np.asfortranarray(df[ENGINE_NUM_COLS].to_numpy(dtype=np.float32))
+    df[ENGINE_NUM_COLS] = pd.DataFrame(arr, columns=ENGINE_NUM_COLS, index=df.index, copy=False)
+    df = df[[c for c in df.columns if c not in ENGINE_COLS] + ENGINE_COLS]
 
     # Clean up: dom league helper columns can be kept (analysts like to see them),
     # but if you want to hide them, comment out the next two lines.
     # df = df.drop(columns=["engine_home_dom_league","engine_away_dom_league"], errors="ignore")
 
-    df.to_csv(UP, index=False)
+    write_table(df, UP)
     print(f"[OK] engineered tournament extras merged → {UP} (rows={len(df)})")
 
 if __name__ == "__main__":
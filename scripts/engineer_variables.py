@@ -19,15 +19,13 @@ def main():
         pd.DataFrame(columns=["team"]).to_csv(OUT,index=False); return
     hist["date"] = pd.to_datetime(hist["date"], errors="coerce")
 
-    # Rest days
-    rest = []
-    for t in pd.unique(pd.concat([hist["home_team"], hist["away_team"]]).dropna()):
-        games = hist[(hist["home_team"]==t)|(hist["away_team"]==t)].sort_values("date")
-        games["prev"] = games["date"].shift(1)
-        games["rest_days"] = (games["date"]-games["prev"]).dt.days
-        games["games_last14"] = (games["date"]-games["prev"]).dt.days.apply(lambda d: 1 if d and d<=14 else 0)
-        rest.append(games.assign(team=t)[["date","team","rest_days","games_last14"]])
-    restdf = pd.concat(rest, ignore_index=True)
+    # Rest days (one sort + grouped shift over a long team/date frame)
+    home = hist[["date","home_team"]].rename(columns={"home_team":"team"})
+    away = hist.loc[hist["away_team"] != hist["home_team"], ["date","away_team"]].rename(columns={"away_team":"team"})
+    restdf = pd.concat([home, away], ignore_index=True).dropna(subset=["team"]) \
+               .sort_values(["team","date"], kind="stable").reset_index(drop=True)
+    restdf["rest_days"] = (restdf["date"] - restdf.groupby("team", sort=False)["date"].shift(1)).dt.days
+    restdf["games_last14"] = (restdf["rest_days"].gt(0) & restdf["rest_days"].le(14)).astype("int8")
 
     # Finishing luck = Goals – xG (rolling)
     hist["result_home"] = np.where(hist["home_goals"]>hist["away_goals"],1,np.where(hist["home_goals"]==hist["away_goals"],0.5,0))
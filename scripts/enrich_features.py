@@ -7,7 +7,8 @@ Adds (safe/optional where data exists):
 - SPI rank & spi_ci_width (home/away)
 - Lineups: availability, injury indices, experienced starters %
 - Team/ref seasonal priors (cards, corners)
-- FBref per-slice metrics (regex-picked, schema-agnostic):
+- FBref per-slice metrics (regex-picked, schema-agnostic; --fbref-mode combined reads
+  sd_fbref_team_stats.csv from fbref_merge_slices.py instead of the slice CSVs):
   • passing → pass%                     → home_pass_pct / away_pass_pct
   • keepers → PSxG prevented            → home_gk_psxg_prevented / away_gk_psxg_prevented
   • goal_shot_creation → SCA/90 & GCA/90
@@ -16,16 +17,22 @@ Adds (safe/optional where data exists):
   • press-to-shot conversion → home_press_to_sca / away_press_to_sca
 - Stadium crowd, travel distances
 - Never crashes if inputs are missing; writes valid enriched CSV
+- When UPCOMING_fixtures.csv is newer than the enriched file, starts from the fixtures
+  and skips parsing the stale enriched file (--incremental always overlays onto it)
 
 Output:
-  data/UPCOMING_7D_enriched.csv
+  data/UPCOMING_7D_enriched.csv  (+ .parquet sidecar, read back by engineer_extra_variables when fresher)
 """
 
 import os
+import argparse
 import re
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 
+from util_io import read_fresh_parquet, read_table, write_table
+
 DATA = "data"
 UP_PATH   = os.path.join(DATA, "UPCOMING_7D_enriched.csv")
 FIX_PATH  = os.path.join(DATA, "UPCOMING_fixtures.csv")
@@ -35,6 +42,10 @@ STADIUM   = os.path.join(DATA, "stadium_crowd.csv")           # optional
 TRAVEL    = os.path.join(DATA, "travel_matrix.csv")           # optional
 SPI       = os.path.join(DATA, "sd_538_spi.csv")
 RCC       = os.path.join(DATA, "ref_cards_corners.csv")       # team/ref priors
+CACHE_DIR = os.path.join(DATA, ".cache")                      # parquet copies of parsed input CSVs
+
+# FBref all-slices table from fbref_merge_slices.py (non-key columns suffixed _<slice>); --fbref-mode combined
+FBREF_COMBINED = os.path.join(DATA, "sd_fbref_team_stats.csv")
 
 # FBref per-slice CSVs (consolidated) produced by connectors/fbref_fetch_streamlined.py
 FBREF_SLICE = {
@@ -51,6 +62,18 @@ FBREF_SLICE = {
     "playing_time":        os.path.join(DATA, "fbref_slice_playing_time.csv"),
 }
 
+# (slice, feature, regexes picking its column) -> home_<feature> / away_<feature>; compiled once at import
+SLICE_FEATURES = [(k, f, [re.compile(p, re.I) for p in pats]) for k, f, pats in [
+    ("passing",            "pass_pct",               [r"Cmp%|Pass%|Cmp_perc|passing.*(pct|%)"]),
+    ("keepers",            "gk_psxg_prevented",      [r"PSxG[+|-]G|psxg.*prevent|gk.*prevent|psxg_minus_ga|psxg\+\/-"]),
+    ("goal_shot_creation", "sca90",                  [r"\bSCA/90\b|sca.*90|sca90"]),
+    ("goal_shot_creation", "gca90",                  [r"\bGCA/90\b|gca.*90|gca90"]),
+    ("defense",            "pressures90",            [r"pressures.*90|pressures/90|pr(ess)?/90"]),
+    ("defense",            "tackles90",              [r"tackles.*90|tackles/90|tkls/90|tkls.*90"]),
+    ("possession",         "setpiece_share",         [r"set[- ]?piece(s)?(_share)?|set[- ]?pieces?/90|sp\%|set_?piece_?(share|pct|%)"]),
+    ("misc",               "cards_per_match",        [r"cards_?per_?match|Cards/Match|cards/90|crds/90"]),
+]]
+
 SAFE_DEFAULTS = {
     "home_injury_index": 0.30, "away_injury_index": 0.30,
     "ref_pen_rate": 0.30,
@@ -71,11 +94,107 @@ ODDS_EXTRA_FIELDS = [
     "open_spread_home_line","close_spread_home_line","open_spread_away_line","close_spread_away_line"
 ]
 
-def safe_read(path, cols=None):
+# suffixed leftovers of the old cards/corners merges (season came along from both sides)
+LEGACY_COLS = ["season_x", "season_y"]
+
+# columns each side input is read with (everything else is never parsed)
+LINEUP_COLS  = ["fixture_id","home_injury_index","away_injury_index",
+                "home_avail","away_avail","home_exp_starters_pct","away_exp_starters_pct"]
+SPI_COLS     = ["team","rank","spi_ci_width"]
+RCC_COLS     = ["league","team","season","avg_cards","avg_corners","referee","ref_avg_cards"]
+REF_COLS     = ["fixture_id","ref_pen_rate"]
+STADIUM_COLS = ["home_team","crowd_index"]
+TRAVEL_COLS  = {"home_team","away_team","travel_km_home","home_travel_km","travel_km_away","away_travel_km"}
+
+# has_* flag -> the odds columns whose presence sets it
+PRESENCE_FLAGS = {
+    "has_ou":     ["ou_over_price","ou_under_price"],
+    "has_btts":   ["btts_yes_price","btts_no_price"],
+    "has_spread": ["spread_home_line","spread_away_line"],
+}
+
+# pandas' default NA tokens, so Arrow-parsed frames null out the same cells pd.read_csv would
+PD_NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+                "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+# join keys parsed as text whatever they look like (a "1860" team or numeric league code stays a string)
+KEY_TEXT_COLS = ["team","league","home_team","away_team","fixture_id","referee"]
+
+def column_filter(usecols):
+    """usecols (list of names or predicate) as a predicate; None keeps every column."""
+    if usecols is None or callable(usecols):
+        return usecols
+    wanted = set(usecols)
+    return lambda c: c in wanted
+
+def read_csv_fast(path, usecols=None):
+    """
+    pyarrow's multithreaded CSV reader, typed like pd.read_csv (date-like text stays text); pandas otherwise.
+    usecols (names or predicate, absent names ignored) is resolved against the header and pushed into the parse.
+    """
+    keep = column_filter(usecols)
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+        include = [c for c in pd.read_csv(path, nrows=0).columns if keep(c)] if keep else []
+        if keep and not include:
+            return pd.DataFrame()   # none of the wanted columns (pyarrow reads everything for [])
+        table = pcsv.read_csv(path, convert_options=pcsv.ConvertOptions(
+            null_values=PD_NA_VALUES, strings_can_be_null=True, include_columns=include,
+            column_types=dict.fromkeys(KEY_TEXT_COLS, pa.string()),
+            timestamp_parsers=["%%"]))   # a format nothing matches: no timestamp inference
+    except Exception:
+        return pd.read_csv(path, usecols=keep)
+    names = table.column_names
+    if "" in names or len(set(names)) < len(names):
+        return pd.read_csv(path, usecols=keep)   # let pandas name blank/duplicate headers (Unnamed: n, x.1)
+    # plain YYYY-MM-DD / HH:MM:SS still infer as date32/time; their ISO text is exactly what was read
+    for i, f in enumerate(table.schema):
+        if pa.types.is_date(f.type) or pa.types.is_time(f.type):
+            table = table.set_column(i, f.name, table.column(i).cast(pa.string()))
+    df = table.to_pandas()
+    obj = df.columns[df.dtypes == object]
+    if len(obj):   # Arrow nulls arrive as None; pandas uses NaN (and all-null columns are float)
+        df[obj] = df[obj].where(df[obj].notna(), np.nan).infer_objects()
+    return df
+
+def str_keys(s):
+    """Team names as Arrow-backed strings (hash lookups stay in Arrow buffers); plain str without pyarrow."""
+    try:
+        return s.astype("string[pyarrow]")
+    except ImportError:
+        return s.astype(str)
+
+def cache_path(path):
+    return os.path.join(CACHE_DIR, os.path.basename(path) + ".parquet")
+
+def read_cached(path, usecols=None):
+    """
+    CSV via a fresh parquet copy: the writer's own sidecar (util_io.read_table), else data/.cache/.
+    A column subset reads just those parquet columns; a miss parses the whole CSV once, caches it
+    (so later runs can read any subset from parquet), then projects.
+    """
+    return read_table(path, column_filter(usecols), read_csv=read_via_cache)
+
+def read_via_cache(path, keep=None):
+    """read_table's CSV step: the data/.cache copy when fresh, else one full parse that refills it."""
+    pq = cache_path(path)
+    df = read_fresh_parquet(pq, path, keep)
+    if df is not None:
+        return df
+    df = read_csv_fast(path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(pq, engine="pyarrow", index=False)
+    except Exception:
+        pass   # mixed-type columns or no pyarrow: just skip caching
+    return df if keep is None else df[[c for c in df.columns if keep(c)]]
+
+def safe_read(path, cols=None, cache=True, usecols=None):
     if not os.path.exists(path):
         return pd.DataFrame(columns=cols or [])
     try:
-        df = pd.read_csv(path)
+        df = read_cached(path, usecols) if cache else read_csv_fast(path, usecols)
         if cols:
             for c in cols:
                 if c not in df.columns:
@@ -85,59 +204,149 @@ def safe_read(path, cols=None):
         return pd.DataFrame(columns=cols or [])
 
 def ensure_cols(df, col_defaults: dict):
-    for c, v in col_defaults.items():
-        if c not in df.columns:
-            df[c] = v
-    return df
+    # all missing defaults in one assign rather than one column insert each
+    missing = {c: v for c, v in col_defaults.items() if c not in df.columns}
+    return df.assign(**missing) if missing else df
+
+DATE_ID_TABLE = str.maketrans({"-": None, ":": None, "T": "_"})
+
+def normalize_fixture_id(df):
+    """date__home__vs__away ids for every row at once (a missing column reads as "NA")."""
+    part = lambda c: df[c].astype(str) if c in df.columns else pd.Series("NA", index=df.index)
+    slug = lambda s: s.str.strip().str.lower().str.replace(" ", "_", regex=False)
+    d = part("date").str.translate(DATE_ID_TABLE)   # "-"/":" dropped, "T" -> "_" in one pass
+    return d + "__" + slug(part("home_team")) + "__vs__" + slug(part("away_team"))
+
+def coalesce(a, b):
+    """First non-null of a then b, row-wise: one pyarrow.compute pass for numeric pairs, combine_first otherwise."""
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            t = pa.float64() if a.dtype != b.dtype else None
+            out = pc.coalesce(pa.array(a, type=t), pa.array(b, type=t))
+            return pd.Series(out.to_numpy(zero_copy_only=False), index=a.index, name=b.name)
+        except Exception:
+            pass   # no pyarrow or an unconvertible column
+    return a.combine_first(b)
 
-def normalize_fixture_id(row):
-    d = str(row.get("date","NA")).replace("-","").replace("T","_").replace(":","")
-    h = str(row.get("home_team","NA")).strip().lower().replace(" ","_")
-    a = str(row.get("away_team","NA")).strip().lower().replace(" ","_")
-    return f"{d}__{h}__vs__{a}"
+def coalesce_merge(up, other, on, value_cols):
+    """
+    Left-join other's value_cols on `on`; its non-null values override up's (or add the column).
+    Only the value columns are aligned (one keyed reindex), so up itself is never rebuilt by a merge.
+    """
+    wanted = set(value_cols)
+    value_cols = [c for c in other.columns if c in wanted]   # other's order, as a plain merge adds them
+    if not value_cols:
+        return up
+    sub = other.set_index(on)[value_cols]
+    if sub.index.has_duplicates:   # uniqueness is a hash check; only dedupe (first row wins) when it fails
+        sub = sub[~sub.index.duplicated()]
+    keys = pd.MultiIndex.from_frame(up[on]) if len(on) > 1 else pd.Index(up[on[0]])
+    aligned = sub.reindex(keys)
+    aligned.index = up.index
+    for c in value_cols:
+        up[c] = coalesce(aligned[c], up[c]) if c in up.columns else aligned[c]
+    return up
 
 def num(s):
     try: return pd.to_numeric(s, errors="coerce")
     except Exception: return s
 
 def best_col(df, patterns):
-    """Return first column whose name matches any regex in patterns."""
+    """Return first column whose name matches any compiled regex in patterns."""
+    names = [str(c) for c in df.columns]
     for p in patterns:
-        for c in df.columns:
-            if re.search(p, str(c), flags=re.I):
+        for c, name in zip(df.columns, names):
+            if p.search(name):
                 return c
     return None
 
-def merge_slice_feature(up, slice_df, home_name, away_name, feature_patterns):
+def fbref_columns(patterns):
+    """Predicate keeping the team/league/season keys and any column a SLICE_FEATURES regex could pick."""
+    return lambda c: c in ("team","league","season") or any(p.search(str(c)) for p in patterns)
+
+def slices_from_combined(fb):
     """
-    Map a single numeric column from a slice onto home/away columns.
-    feature_patterns: list of regexes to match column in slice_df
+    Split the combined FBref table back into per-slice frames (team, league + that slice's unsuffixed columns).
+    The table has one row per (team, league, season) with NaN in every other slice's columns, so each slice
+    keeps only rows carrying some of its own values, then the latest season per (team, league).
     """
-    if slice_df.empty:
-        up[home_name] = np.nan; up[away_name] = np.nan
-        return up
-
-    key_cols = [c for c in ["team","league","season"] if c in slice_df.columns]
-    col = best_col(slice_df, feature_patterns)
-    if not col or len(key_cols) < 2:  # need at least team & league
-        up[home_name] = np.nan; up[away_name] = np.nan
-        return up
+    slices = {}
+    for key in dict.fromkeys(k for k, _, _ in SLICE_FEATURES):
+        tail = f"_{key}"
+        cols = {c: c[:-len(tail)] for c in fb.columns if isinstance(c, str) and c.endswith(tail)}
+        if cols and {"team","league"}.issubset(fb.columns):
+            sl = fb[["team","league"] + (["season"] if "season" in fb.columns else []) + list(cols)]
+            sl = sl.dropna(subset=list(cols), how="all")
+            if "season" in sl.columns:
+                sl = sl.sort_values("season", ascending=False, kind="stable", na_position="last")
+            slices[key] = (sl.drop_duplicates(["team","league"])
+                             .drop(columns="season", errors="ignore").rename(columns=cols))
+        else:
+            slices[key] = pd.DataFrame()
+    return slices
+
+def merge_slice_features(up, slices, side_teams):
+    """
+    Map every SLICE_FEATURES column onto home_/away_ columns with one (team, league) lookup.
+    slices: slice key -> slice frame; a slice without team/league or a matching column yields NaN.
+    side_teams: home then away team keys of up (str_keys), shared with the SPI lookup.
+    """
+    parts = []   # per feature: (team, league)-indexed column, first row per key within its slice
+    for key, feat, patterns in SLICE_FEATURES:
+        df = slices[key]
+        col = best_col(df, patterns) if not df.empty else None
+        if not col or not {"team","league"}.issubset(df.columns):
+            continue
+        # project to the three needed columns before deduping: the wide slice frame is never copied whole
+        part = df[["team","league",col]].drop_duplicates(["team","league"])
+        parts.append(pd.Series(part[col].to_numpy(), name=feat,
+                               index=pd.MultiIndex.from_arrays([str_keys(part["team"]), part["league"]])))
+    # one aligned concat: the key union is factorized to int codes once instead of per pairwise string merge
+    wide = pd.concat(parts, axis=1) if parts else None
+
+    n = len(up)
+    if wide is not None:   # home and away keys stacked: one probe of the shared index
+        pos = wide.index.get_indexer(pd.MultiIndex.from_arrays([side_teams, pd.concat([up["league"], up["league"]])]))
+    block = {}   # home_/away_ feature columns, gathered by position and assigned to up in one go
+    for _, feat, _ in SLICE_FEATURES:
+        vals = np.full(2 * n, np.nan)
+        if wide is not None and feat in wide.columns:
+            vals = np.where(pos >= 0, wide[feat].to_numpy()[pos], np.nan)
+        block[f"home_{feat}"] = vals[:n]
+        block[f"away_{feat}"] = vals[n:]
+    up[list(block)] = pd.DataFrame(block, index=up.index)
+    return up
 
-    # HOME
-    home_df = slice_df[key_cols + [col]].drop_duplicates(key_cols).rename(columns={col: home_name})
-    up = up.merge(home_df, left_on=["home_team","league"], right_on=["team","league"], how="left")
-    up.drop(columns=[c for c in ["team","season"] if c in up.columns and c not in ["home_team","league"]], inplace=True, errors="ignore")
+def set_presence_flags(up):
+    """has_* = 1 on rows where one of the market's prices/lines is set; a flag without source columns is left as is."""
+    flags = {flag: [c for c in src if c in up.columns] for flag, src in PRESENCE_FLAGS.items()}
+    flags = {flag: src for flag, src in flags.items() if src}
+    if flags:
+        have = up[sorted({c for src in flags.values() for c in src})].notna()   # one notna pass for all markets
+        up[list(flags)] = pd.DataFrame({flag: have[src].any(axis=1).astype("int8") for flag, src in flags.items()})
+    return up
 
-    # AWAY
-    away_df = slice_df[key_cols + [col]].drop_duplicates(key_cols).rename(columns={col: away_name})
-    up = up.merge(away_df, left_on=["away_team","league"], right_on=["team","league"], how="left")
-    up.drop(columns=[c for c in ["team","season"] if c in up.columns and c not in ["away_team","league"]], inplace=True, errors="ignore")
+def enriched_is_stale():
+    """Fixtures rewritten after the last enriched file: that file describes an older window."""
+    return (os.path.exists(FIX_PATH) and os.path.exists(UP_PATH)
+            and os.path.getmtime(FIX_PATH) > os.path.getmtime(UP_PATH))
 
-    return up
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Enrich UPCOMING_7D_enriched.csv with odds extras, priors and FBref features")
+    ap.add_argument("--incremental", action="store_true",
+                    help="overlay onto the existing enriched file even when the fixtures are newer")
+    ap.add_argument("--fbref-mode", choices=["slice","combined"], default="slice",
+                    help="FBref source: per-slice CSVs (default) or the merged sd_fbref_team_stats.csv")
+    args = ap.parse_args(argv)
 
-def main():
-    up = safe_read(UP_PATH)
     fx = safe_read(FIX_PATH)
+    if not args.incremental and not fx.empty and enriched_is_stale():
+        print(f"[OK] {FIX_PATH} is newer than {UP_PATH}; rebuilding from fixtures")
+        up = pd.DataFrame()
+    else:
+        up = safe_read(UP_PATH, cache=False)   # rewritten below every run; a cache would always be stale
     if fx.empty and up.empty:
         pd.DataFrame(columns=["date","league","fixture_id","home_team","away_team"]).to_csv(UP_PATH, index=False)
         print("[WARN] No fixtures/enriched input; wrote header-only")
@@ -146,94 +355,79 @@ def main():
     if up.empty and not fx.empty:
         up = fx.copy()
 
+    # every side input at once: pyarrow parsing releases the GIL, so reads overlap instead of queueing
+    # each with only the columns its block uses: FBref keys plus regex-matching stats, fixed lists elsewhere
+    if args.fbref_mode == "combined":
+        inputs = {"fbref": (FBREF_COMBINED, fbref_columns([p for _, _, pats in SLICE_FEATURES for p in pats]))}
+    else:
+        inputs = {key: (FBREF_SLICE[key], fbref_columns([p for k, _, pats in SLICE_FEATURES if k == key for p in pats]))
+                  for key in dict.fromkeys(k for k, _, _ in SLICE_FEATURES)}
+    inputs.update(lineups=(LINEUPS, LINEUP_COLS), spi=(SPI, SPI_COLS), rcc=(RCC, RCC_COLS), refs=(REFS, REF_COLS),
+                  stadium=(STADIUM, STADIUM_COLS), travel=(TRAVEL, lambda c: c.lower() in TRAVEL_COLS))
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        dfs = dict(zip(inputs, ex.map(lambda a: safe_read(a[0], usecols=a[1]), inputs.values())))
+
     if "league" not in up.columns:
         up["league"] = "GLOBAL"
     if "fixture_id" not in up.columns:
-        up["fixture_id"] = up.apply(normalize_fixture_id, axis=1)
+        up["fixture_id"] = normalize_fixture_id(up)
 
     up = ensure_cols(up, SAFE_DEFAULTS)
 
     # --- Odds extras & line moves (safe if opening/closing exist) ---
-    if not fx.empty and "fixture_id" in fx.columns:
-        cols = ["fixture_id"] + [c for c in ODDS_EXTRA_FIELDS if c in fx.columns]
-        tmp = fx[cols].copy() if len(cols) > 1 else pd.DataFrame()
-        if not tmp.empty:
-            up = up.merge(tmp, on="fixture_id", how="left", suffixes=("", "_od"))
-            if "ou_over_price" in up.columns or "ou_under_price" in up.columns: up["has_ou"] = 1
-            if "btts_yes_price" in up.columns or "btts_no_price" in up.columns: up["has_btts"] = 1
-            if "spread_home_line" in up.columns or "spread_away_line" in up.columns: up["has_spread"] = 1
-
-            # Line moves
-            if "open_ou_total" in up.columns and "close_ou_total" in up.columns:
-                up["ou_move"] = num(up["close_ou_total"]) - num(up["open_ou_total"])
-
-            for side in ["home","away","draw"]:
-                op = f"open_{side}_odds"; cl = f"close_{side}_odds"; mv = f"h2h_{side}_move"
-                if op in up.columns and cl in up.columns:
-                    up[mv] = num(up[cl]) - num(up[op])
-
-            if "open_spread_home_line" in up.columns and "close_spread_home_line" in up.columns:
-                up["spread_home_line_move"] = num(up["close_spread_home_line"]) - num(up["open_spread_home_line"])
-            if "open_spread_away_line" in up.columns and "close_spread_away_line" in up.columns:
-                up["spread_away_line_move"] = num(up["close_spread_away_line"]) - num(up["open_spread_away_line"])
+    if not fx.empty and "fixture_id" in fx.columns and any(c in fx.columns for c in ODDS_EXTRA_FIELDS):
+        # only fields up lacks: its own values win, as before, without parking fx's copy in *_od columns
+        cols = ["fixture_id"] + [c for c in ODDS_EXTRA_FIELDS if c in fx.columns and c not in up.columns]
+        if len(cols) > 1:
+            up = up.merge(fx[cols].drop_duplicates("fixture_id"), on="fixture_id", how="left", validate="m:1")
+
+        # Line moves from up's open/close columns: merged just above or already there (up built from fx)
+        if "open_ou_total" in up.columns and "close_ou_total" in up.columns:
+            up["ou_move"] = num(up["close_ou_total"]) - num(up["open_ou_total"])
+
+        for side in ["home","away","draw"]:
+            op = f"open_{side}_odds"; cl = f"close_{side}_odds"; mv = f"h2h_{side}_move"
+            if op in up.columns and cl in up.columns:
+                up[mv] = num(up[cl]) - num(up[op])
+
+        if "open_spread_home_line" in up.columns and "close_spread_home_line" in up.columns:
+            up["spread_home_line_move"] = num(up["close_spread_home_line"]) - num(up["open_spread_home_line"])
+        if "open_spread_away_line" in up.columns and "close_spread_away_line" in up.columns:
+            up["spread_away_line_move"] = num(up["close_spread_away_line"]) - num(up["open_spread_away_line"])
+
+    # per-row presence flags from whatever odds columns up now has (merged just above or carried in)
+    up = set_presence_flags(up)
 
     # --- Lineups: injuries/availability + experienced starters pct ---
-    ln = safe_read(LINEUPS, ["fixture_id","home_injury_index","away_injury_index",
-                             "home_avail","away_avail","home_exp_starters_pct","away_exp_starters_pct"])
+    ln = ensure_cols(dfs["lineups"], dict.fromkeys(LINEUP_COLS, np.nan))
     if not ln.empty and "fixture_id" in ln.columns:
-        ln = ln.drop_duplicates("fixture_id")
-        up = up.merge(ln, on="fixture_id", how="left", suffixes=("", "_ln"))
-        for c in ["home_injury_index","away_injury_index","home_avail","away_avail","home_exp_starters_pct","away_exp_starters_pct"]:
-            if f"{c}_ln" in up.columns:
-                up[c] = np.where(up[f"{c}_ln"].notna(), up[f"{c}_ln"], up.get(c, np.nan))
-                up.drop(columns=[f"{c}_ln"], inplace=True, errors="ignore")
+        up = coalesce_merge(up, ln, ["fixture_id"], ["home_injury_index","away_injury_index","home_avail","away_avail",
+                                                     "home_exp_starters_pct","away_exp_starters_pct"])
+
+    # home then away team names as one Arrow-string key array, built once for the SPI and FBref lookups
+    side_teams = str_keys(pd.concat([up["home_team"], up["away_team"]], ignore_index=True))
 
     # --- SPI: rank + ci_width (map to home/away if present) ---
-    spi = safe_read(SPI)
-    if not spi.empty and "team" in spi.columns:
-        if "rank" in spi.columns:
-            rank_map = dict(zip(spi["team"].astype(str), spi["rank"]))
-            up["home_spi_rank"] = up["home_team"].astype(str).map(rank_map)
-            up["away_spi_rank"] = up["away_team"].astype(str).map(rank_map)
-        if "spi_ci_width" in spi.columns:
-            wmap = dict(zip(spi["team"].astype(str), spi["spi_ci_width"]))
-            up["home_spi_ci_width"] = up["home_team"].astype(str).map(wmap)
-            up["away_spi_ci_width"] = up["away_team"].astype(str).map(wmap)
-
-    # --- FBref per-slice features (read consolidated per-slice CSVs) ---
-    # Passing → pass%
-    passing = safe_read(FBREF_SLICE["passing"])
-    up = merge_slice_feature(up, passing, "home_pass_pct", "away_pass_pct",
-                             feature_patterns=[r"Cmp%|Pass%|Cmp_perc|passing.*(pct|%)"])
-
-    # Keepers → PSxG prevented (or similar)
-    keepers = safe_read(FBREF_SLICE["keepers"])
-    up = merge_slice_feature(up, keepers, "home_gk_psxg_prevented", "away_gk_psxg_prevented",
-                             feature_patterns=[r"PSxG[+|-]G|psxg.*prevent|gk.*prevent|psxg_minus_ga|psxg\+\/-"])
-
-    # GCA/SCA per 90
-    gca = safe_read(FBREF_SLICE["goal_shot_creation"])
-    up = merge_slice_feature(up, gca, "home_sca90", "away_sca90",
-                             feature_patterns=[r"\bSCA/90\b|sca.*90|sca90"])
-    up = merge_slice_feature(up, gca, "home_gca90", "away_gca90",
-                             feature_patterns=[r"\bGCA/90\b|gca.*90|gca90"])
-
-    # Defense → pressures/90 & tackles/90
-    defense = safe_read(FBREF_SLICE["defense"])
-    up = merge_slice_feature(up, defense, "home_pressures90", "away_pressures90",
-                             feature_patterns=[r"pressures.*90|pressures/90|pr(ess)?/90"])
-    up = merge_slice_feature(up, defense, "home_tackles90", "away_tackles90",
-                             feature_patterns=[r"tackles.*90|tackles/90|tkls/90|tkls.*90"])
-
-    # Possession → set-piece creation proxy
-    possession = safe_read(FBREF_SLICE["possession"])
-    up = merge_slice_feature(up, possession, "home_setpiece_share", "away_setpiece_share",
-                             feature_patterns=[r"set[- ]?piece(s)?(_share)?|set[- ]?pieces?/90|sp\%|set_?piece_?(share|pct|%)"])
-
-    # Misc → fallback cards per match
-    misc = safe_read(FBREF_SLICE["misc"])
-    up = merge_slice_feature(up, misc, "home_cards_per_match", "away_cards_per_match",
-                             feature_patterns=[r"cards_?per_?match|Cards/Match|cards/90|crds/90"])
+    spi = dfs["spi"]
+    spi_cols = [c for c in ["rank","spi_ci_width"] if c in spi.columns]
+    if not spi.empty and "team" in spi.columns and spi_cols:
+        # one indexed lookup of home+away names serves every SPI column (last row per team wins);
+        # the keyed frame holds just the SPI value columns, and results land on up in one block
+        lk = (spi[spi_cols].set_axis(str_keys(spi["team"]).rename("team"))
+                 .pipe(lambda f: f[~f.index.duplicated(keep="last")]))
+        both = lk.reindex(side_teams)
+        n = len(up)
+        block = {}
+        for c, name in [("rank","spi_rank"), ("spi_ci_width","spi_ci_width")]:
+            if c in spi_cols:
+                vals = both[c].to_numpy()
+                block[f"home_{name}"] = vals[:n]
+                block[f"away_{name}"] = vals[n:]
+        up[list(block)] = pd.DataFrame(block, index=up.index)
+
+    # --- FBref per-slice features (per-slice CSVs, or the combined table split back per slice) ---
+    slices = slices_from_combined(dfs["fbref"]) if args.fbref_mode == "combined" else dfs
+    up = merge_slice_features(up, slices, side_teams)
 
     # Press-to-shot conversion (if both pressures90 & sca90 present)
     if {"home_pressures90","away_pressures90","home_sca90","away_sca90"}.issubset(up.columns):
@@ -241,40 +435,29 @@ def main():
         up["away_press_to_sca"] = num(up["away_sca90"]) / (num(up["away_pressures90"]) + 1e-9)
 
     # --- Cards & corners priors (team/referee) ---
-    rcc = safe_read(RCC)
+    rcc = dfs["rcc"]
     if not rcc.empty and {"league","team","season"}.issubset(rcc.columns):
+        # rows come per (league, team, season), oldest first: put the latest season first so coalesce_merge keeps it
+        rcc = rcc.sort_values("season", ascending=False, kind="stable", na_position="last")
         for side in ["home","away"]:
-            sub = rcc.rename(columns={"team":f"{side}_team"})
-            keep = [f"{side}_team","league","season","avg_cards","avg_corners"]
-            keep = [k for k in keep if k in sub.columns]
-            if len(keep) >= 4:
-                up = up.merge(sub[keep], on=[f"{side}_team","league"], how="left")
-                up.rename(columns={"avg_cards":f"{side}_avg_cards","avg_corners":f"{side}_avg_corners"}, inplace=True)
+            sub = rcc.rename(columns={"team":f"{side}_team", "avg_cards":f"{side}_avg_cards",
+                                      "avg_corners":f"{side}_avg_corners"})
+            up = coalesce_merge(up, sub, [f"{side}_team","league"], [f"{side}_avg_cards",f"{side}_avg_corners"])
         if "referee" in up.columns and "referee" in rcc.columns and "ref_avg_cards" in rcc.columns:
-            up = up.merge(rcc[["referee","ref_avg_cards"]].drop_duplicates("referee"),
-                          on="referee", how="left")
+            up = coalesce_merge(up, rcc, ["referee"], ["ref_avg_cards"])
 
     # --- Referee tendencies (legacy optional) ---
-    rf = safe_read(REFS)
+    rf = dfs["refs"]
     if not rf.empty and "fixture_id" in rf.columns:
-        keep = ["fixture_id"]
-        if "ref_pen_rate" in rf.columns: keep.append("ref_pen_rate")
-        up = up.merge(rf[keep].drop_duplicates("fixture_id"), on="fixture_id", how="left", suffixes=("", "_rf"))
-        if "ref_pen_rate_rf" in up.columns:
-            up["ref_pen_rate"] = np.where(up["ref_pen_rate_rf"].notna(), up["ref_pen_rate_rf"], up["ref_pen_rate"])
-            up.drop(columns=["ref_pen_rate_rf"], inplace=True, errors="ignore")
+        up = coalesce_merge(up, rf, ["fixture_id"], ["ref_pen_rate"])
 
     # --- Stadium crowd (optional) ---
-    sc = safe_read(STADIUM)
+    sc = dfs["stadium"]
     if not sc.empty and {"home_team","crowd_index"}.issubset(sc.columns) and "home_team" in up.columns:
-        sc_ht = sc[["home_team","crowd_index"]].drop_duplicates("home_team")
-        up = up.merge(sc_ht, on="home_team", how="left", suffixes=("", "_st"))
-        if "crowd_index_st" in up.columns:
-            up["crowd_index"] = np.where(up["crowd_index_st"].notna(), up["crowd_index_st"], up["crowd_index"])
-            up.drop(columns=["crowd_index_st"], inplace=True, errors="ignore")
+        up = coalesce_merge(up, sc, ["home_team"], ["crowd_index"])
 
     # --- Travel distances (optional) ---
-    tv = safe_read(TRAVEL)
+    tv = dfs["travel"]
     if not tv.empty:
         cols = {c.lower(): c for c in tv.columns}
         hh = cols.get("home_team") or "home_team"
@@ -282,24 +465,34 @@ def main():
         th = cols.get("travel_km_home") or cols.get("home_travel_km")
         ta = cols.get("travel_km_away") or cols.get("away_travel_km")
         if all([hh in tv.columns, aa in tv.columns, th in tv.columns, ta in tv.columns]):
-            t2 = tv[[hh, aa, th, ta]].drop_duplicates([hh, aa]).rename(columns={
+            t2 = tv[[hh, aa, th, ta]].rename(columns={
                 hh:"home_team", aa:"away_team", th:"home_travel_km", ta:"away_travel_km"
             })
-            up = up.merge(t2, on=["home_team","away_team"], how="left", suffixes=("", "_tv"))
-            for c in ["home_travel_km","away_travel_km"]:
-                if f"{c}_tv" in up.columns:
-                    up[c] = np.where(up[f"{c}_tv"].notna(), up[f"{c}_tv"], up[c])
-                    up.drop(columns=[f"{c}_tv"], inplace=True, errors="ignore")
+            up = coalesce_merge(up, t2, ["home_team","away_team"], ["home_travel_km","away_travel_km"])
 
     # Sort & write
     if "date" in up.columns:
         try:
-            up["date"] = pd.to_datetime(up["date"], errors="coerce")
+            try:   # upstream writers emit ISO dates: the ISO8601 fast path, inference only for odd inputs
+                up["date"] = pd.to_datetime(up["date"], format="ISO8601")
+            except (ValueError, TypeError):
+                up["date"] = pd.to_datetime(up["date"], errors="coerce")
             up = up.sort_values(["date","home_team","away_team"], na_position="last")
         except Exception:
             pass
 
-    up.to_csv(UP_PATH, index=False)
+    # one projection drops merge leftovers that older enriched files still carry
+    legacy = set(LEGACY_COLS) | {f"{c}_od" for c in ODDS_EXTRA_FIELDS}
+    if legacy.intersection(up.columns):
+        up = up.loc[:, [c for c in up.columns if c not in legacy]]
+
+    # odds/priors/features need no more than float32; 0/1 presence flags fit int8
+    f64 = up.columns[up.dtypes == "float64"]
+    up[f64] = up[f64].astype("float32")
+    flags = [c for c in ["has_ou","has_btts","has_spread"] if pd.api.types.is_integer_dtype(up[c])]
+    up[flags] = up[flags].astype("int8")
+
+    write_table(up, UP_PATH)   # + typed sidecar; later steps read it instead of re-parsing the CSV
     print(f"[OK] enrich_features: wrote {UP_PATH} rows={len(up)}")
 
 if __name__ == "__main__":
@@ -10,11 +10,15 @@ ENRICHED      = os.path.join("outputs", "UPCOMING_7D_enriched.csv")     # option
 API_PROBE     = os.path.join("data", "api_probe_report.json")           # optional
 OUT           = os.path.join(RUN_DIR, "EXECUTION_FEASIBILITY.csv")
 
-def read_csv(path):
+def read_csv(path, usecols=None):
     if os.path.exists(path) and os.path.getsize(path) > 0:
-        return pd.read_csv(path)
+        return pd.read_csv(path, usecols=usecols)
     return pd.DataFrame()
 
+def enriched_cols(c):
+    """The only enriched columns build_from_enriched looks at; the wide feature set is never parsed."""
+    return c in ("fixture_id","league","book_count","market_sources") or c.endswith("_prob")
+
 def load_api_probe(path):
     if os.path.exists(path) and os.path.getsize(path) > 0:
         try:
@@ -58,7 +62,8 @@ def build_from_enriched(df):
         num_books = df["book_count"]
     elif "market_sources" in df.columns:
         # market_sources might be a semi-colon list of sources
-        num_books = df["market_sources"].fillna("").astype(str).map(lambda s: len([x for x in s.split(";") if x]))
+        # non-empty tokens = runs of non-";" characters, counted by one vectorized regex pass
+        num_books = df["market_sources"].fillna("").astype(str).str.count(r"[^;]+")
     else:
         num_books = pd.Series(0, index=df.index)
     out["num_books"] = num_books.fillna(0).astype(int)
@@ -83,7 +88,9 @@ def main():
         source = "odds_csv"
     else:
         # 2) Fallback to enriched fixtures
-        enr = read_csv(ENRICHED)
+        enr = read_csv(ENRICHED, usecols=enriched_cols)
+        if enr.columns.empty:
+            enr = read_csv(ENRICHED, usecols=[0])   # none of them present: one column still carries the rows
         feas = build_from_enriched(enr)
         source = "enriched"
 
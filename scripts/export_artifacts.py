@@ -18,7 +18,6 @@ REQUIRED = [
     "ROI_BY_SLICE.csv",
     "FEATURE_IMPORTANCE.csv",
     "FEATURE_DRIFT.csv",
-    "BACKTEST_SUMMARY.csv",          # optional to keep; present in many runs
     # Diagnostics
     "ODDS_COVERAGE_REPORT.csv",
     "DATA_QUALITY_REPORT.csv",
@@ -33,14 +32,20 @@ REQUIRED = [
     "ODDS_MOVE_FEATURES.csv"         # odds move deltas (AM vs T-60)
 ]
 
+# bundled when the run produced them; never a reason to fail the export
+OPTIONAL = [
+    "BACKTEST_SUMMARY.csv",          # present in many runs
+]
+
 def main():
     missing = [f for f in REQUIRED if not os.path.exists(os.path.join(RUN_DIR, f))]
     if missing:
         raise SystemExit(f"Missing required artifacts: {missing}")
 
     out_zip = os.path.join(RUN_DIR, "sbm-7d-bundle.zip")
-    with zipfile.ZipFile(out_zip, "w", zipfile.ZIP_DEFLATED) as z:
-        for f in REQUIRED:
+    # level 1: text artifacts still shrink several-fold, at a fraction of the default level's zlib time
+    with zipfile.ZipFile(out_zip, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+        for f in REQUIRED + [f for f in OPTIONAL if os.path.exists(os.path.join(RUN_DIR, f))]:
             z.write(os.path.join(RUN_DIR, f), arcname=f)
     print("Exported bundle:", out_zip)
 
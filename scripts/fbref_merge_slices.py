@@ -5,15 +5,19 @@ Inputs:
   data/fbref_slice_<canonical>.csv   (written by fbref_fetch_streamlined.py)
 Outputs:
   data/sd_fbref_team_stats.csv
+  data/sd_fbref_team_stats.parquet   (typed sidecar, util_io.write_table)
   data/sd_fbref_team_stats.cache.csv
 Notes:
 - Suffix non-key columns by slice key on merge to avoid collisions
-- Incremental outer merge (memory-safe)
+- All slices stacked, then first non-null per key (one pass; same result as chained outer merges)
 """
 
 import os, glob
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
+from util_io import write_table
+
 DATA = "data"
 OUT  = os.path.join(DATA, "sd_fbref_team_stats.csv")
 CACHE= os.path.join(DATA, "sd_fbref_team_stats.cache.csv")
@@ -42,11 +46,14 @@ def main():
             print("[FBref merge] no slice CSVs; wrote stub")
             return
 
-    merged = None
-    for p in paths:
+    # independent files: parse them concurrently (the C parser releases the GIL), then fold in path order
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as ex:
+        dfs = list(ex.map(_safe_read, paths))
+
+    frames = []
+    for p, df in zip(paths, dfs):
         # suffix by slice key from filename, e.g., fbref_slice_standard.csv → 'standard'
         slice_key = os.path.basename(p).replace("fbref_slice_","").replace(".csv","")
-        df = _safe_read(p)
         if df.empty: 
             print(f"[FBref merge] skip empty slice {slice_key}")
             continue
@@ -55,10 +62,16 @@ def main():
             if k not in df.columns:
                 df[k] = None
         # suffix non-keys to avoid collisions
-        df = _suffix_nonkeys(df, slice_key)
-        # incremental outer merge
-        merged = df if merged is None else pd.merge(merged, df, on=list(KEYS), how="outer")
-        print(f"[FBref merge] merged {slice_key} → now shape={merged.shape}")
+        frames.append(_suffix_nonkeys(df, slice_key))
+        print(f"[FBref merge] read {slice_key} shape={df.shape}")
+
+    # slices share only KEYS, so one stacked frame + first non-null per key is the outer merge of them all:
+    # one hash pass over KEYS instead of re-merging a growing accumulator per slice
+    merged = None
+    if frames:
+        merged = (pd.concat(frames, ignore_index=True, sort=False)
+                    .groupby(list(KEYS), as_index=False, sort=True, dropna=False).first())
+        print(f"[FBref merge] merged {len(frames)} slices → shape={merged.shape}")
 
     if merged is None or merged.empty:
         if os.path.exists(CACHE):
@@ -76,7 +89,9 @@ def main():
     other = [c for c in merged.columns if c not in key_cols]
     merged = merged[key_cols + other]
 
-    merged.to_csv(OUT, index=False)
+    # CSV + typed parquet sidecar: mostly-NaN float slices store as null bitmaps, team/league as dictionary pages.
+    # Rows are already in KEYS order (groupby sort), so row-group min/max stats allow range-pruned reads.
+    write_table(merged, OUT, row_group_size=100_000)
     try: merged.to_csv(CACHE, index=False)
     except Exception: pass
     print(f"[FBref merge] wrote {OUT} rows={len(merged)} cols={len(merged.columns)}")
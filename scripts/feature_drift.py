@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os, glob, json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime
 
@@ -8,19 +9,26 @@ RUN_DIR = os.path.join("runs", datetime.utcnow().strftime("%Y-%m-%d"))
 os.makedirs(RUN_DIR, exist_ok=True)
 OUT = os.path.join(RUN_DIR, "FEATURE_DRIFT.csv")
 
+def load_coef(fn):
+    """(league, coef_info) from one BTTS job file; None when unreadable or without coef_info."""
+    league = os.path.basename(fn).split("__",1)[-1].replace(".job.json","")
+    try:
+        with open(fn) as f:
+            coef = json.load(f).get("coef_info")
+    except Exception:
+        return None
+    return None if coef is None else (league, coef)
+
 def main():
-    rows=[]
-    for fn in glob.glob(os.path.join(DATA_DIR, "models_btts", "btts_model__*.job.json")):
-        league = os.path.basename(fn).split("__",1)[-1].replace(".job.json","")
-        try:
-            meta = json.load(open(fn))
-            coef = meta.get("coef_info")
-            if coef is not None:
-                rows.append({"league":league, "model":"BTTS", "coef_summary":str(coef)})
-        except Exception:
-            continue
-    pd.DataFrame(rows).to_csv(OUT, index=False)
+    paths = glob.glob(os.path.join(DATA_DIR, "models_btts", "btts_model__*.job.json"))
+    # many small independent files: overlap the open/read/parse waits
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        metas = [m for m in ex.map(load_coef, paths) if m is not None]
+    leagues = [league for league, _ in metas]
+    coefs   = [str(coef) for _, coef in metas]
+    pd.DataFrame({"league":leagues, "model":"BTTS", "coef_summary":coefs},
+                 columns=["league","model","coef_summary"]).to_csv(OUT, index=False)
     print("FEATURE_DRIFT.csv written")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
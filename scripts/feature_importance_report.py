@@ -6,7 +6,8 @@ Primary path:
   - If TRAIN_MATRIX.csv exists (date, league, target + numeric features):
       * For each league with enough rows:
           - Time-sort, take most recent 20% as evaluation window
-          - Fit a simple LogisticRegression on older 80%
+          - Drop columns constant/empty on the older 80%, mean-impute the rest
+          - Fit a capped HistGradientBoostingClassifier on older 80%
           - Compute permutation importance on the 20% tail
           - Report Top 15 and Bottom 10 features by mean importance
 
@@ -18,8 +19,9 @@ Outputs:
   reports/FEATURE_IMPORTANCE.md
 """
 
-import os, re, json, numpy as np, pandas as pd
+import os, re, json, hashlib, warnings, numpy as np, pandas as pd
 from datetime import datetime
+from functools import lru_cache
 
 DATA = "data"
 REP  = "reports"
@@ -29,6 +31,10 @@ TRAIN_MTX = os.path.join(DATA, "TRAIN_MATRIX.csv")
 TRAIN_RPT = os.path.join(REP,  "TRAINING_REPORT.md")
 STACK_RPT = os.path.join(REP,  "STACK_TRAINING_REPORT.md")
 OUT_MD    = os.path.join(REP,  "FEATURE_IMPORTANCE.md")
+IMP_CACHE = os.path.join(REP,  ".imp_cache")   # per-league importance parquet, keyed by _imp_key
+
+# bump when the estimator/permutation config in _one_league changes (invalidates IMP_CACHE)
+MODEL_TAG = "hgb-100-d6-es-rs42|perm-5-rs42"
 
 def safe_read_csv(p):
     if not os.path.exists(p): return pd.DataFrame()
@@ -79,6 +85,47 @@ def _from_reports():
     _write_md(lines)
     return True
 
+def _drop_constant_impute(X_tr, X_te):
+    """
+    Keep columns that vary on the training slab (all-NaN / constant ones have zero importance by
+    construction) and fill NaNs with the training means. Returns (keep mask, X_tr, X_te).
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN columns: nanstd/nanmean → NaN
+        keep = np.nanstd(X_tr, axis=0) > 1e-12
+        mu = np.nanmean(X_tr[:, keep], axis=0)
+    X_tr, X_te = X_tr[:, keep], X_te[:, keep]
+    return keep, np.where(np.isnan(X_tr), mu, X_tr), np.where(np.isnan(X_te), mu, X_te)
+
+def _imp_key(lg, cols, *arrays) -> str:
+    """blake2b over league, model tag, feature list and the raw bytes (+ shape/dtype) of the sliced arrays."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x00".join([str(lg), MODEL_TAG, *cols]).encode())
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.shape}{a.dtype}".encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+@lru_cache(maxsize=None)
+def _read_imp(path):
+    """In-process layer over IMP_CACHE (only called for paths that exist)."""
+    return pd.read_parquet(path)
+
+def _one_league(lg, X_tr, y_tr, X_te, y_te, Xcols):
+    """Fit + permutation importance for one league; returns (lg, imp sorted by mean) or (lg, error message)."""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.inspection import permutation_importance
+    try:
+        # ranking only needs a fast, reasonable model; same capped config for every league
+        model = HistGradientBoostingClassifier(max_iter=100, max_depth=6, early_stopping=True, random_state=42)
+        model.fit(X_tr, y_tr)
+        pi = permutation_importance(model, X_te, y_te, n_repeats=5, random_state=42)
+        imp = pd.DataFrame({"feature": Xcols, "mean": pi.importances_mean, "std": pi.importances_std})
+        return lg, imp.sort_values("mean", ascending=False)
+    except Exception as e:
+        return lg, str(e)
+
 def _from_train_matrix():
     df = safe_read_csv(TRAIN_MTX)
     if df.empty or not {"date","league","target"}.issubset(df.columns):
@@ -86,48 +133,70 @@ def _from_train_matrix():
 
     # sanitize
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"]).sort_values("date")
+    # league-contiguous, date-ordered within each league (same groups/order as groupby("league"))
+    df = df.dropna(subset=["date", "league"]).sort_values(["league","date"], kind="stable")
     # numeric features only
     drop_cols = {"fixture_id","target","date","league","home_team","away_team"}
     Xcols = [c for c in df.columns if c not in drop_cols and str(df[c].dtype).startswith(("float","int"))]
     if not Xcols:
         return False
 
-    from sklearn.linear_model import LogisticRegression
-    from sklearn.inspection import permutation_importance
+    from joblib import Parallel, delayed
 
-    lines = ["# FEATURE IMPORTANCE", "", f"_Generated: {datetime.utcnow().isoformat()}Z_", ""]
-    for lg, g in df.groupby("league"):
-        if len(g) < 200:
+    # one float32 matrix for all leagues; each league is a [start:end) row slice of it
+    X = df[Xcols].to_numpy(dtype=np.float32)
+    y = df["target"].to_numpy()
+    lg_arr = df["league"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, lg_arr[1:] != lg_arr[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+
+    jobs = []
+    for start, end in zip(starts, ends):
+        if end - start < 200:
             continue
-        split = int(len(g)*0.8)
-        g_train = g.iloc[:split]
-        g_eval  = g.iloc[split:]
-        if len(g_eval) < 50:
+        split = start + int((end - start)*0.8)
+        if end - split < 50:
             continue
-        X_tr = g_train[Xcols].values
-        y_tr = g_train["target"].values
-        X_te = g_eval[Xcols].values
-        y_te = g_eval["target"].values
-
+        keep, X_tr, X_te = _drop_constant_impute(X[start:split], X[split:end])
+        jobs.append((lg_arr[start], X_tr, y[start:split], X_te, y[split:end],
+                     [c for c, k in zip(Xcols, keep) if k], [c for c, k in zip(Xcols, keep) if not k]))
+
+    # unchanged leagues (same features + same data) reuse their cached importance table
+    os.makedirs(IMP_CACHE, exist_ok=True)
+    paths = [os.path.join(IMP_CACHE, _imp_key(lg, cols, X_tr, y_tr, X_te, y_te) + ".parquet")
+             for lg, X_tr, y_tr, X_te, y_te, cols, _ in jobs]
+    results = [(job[0], _read_imp(p)) if os.path.exists(p) else None for job, p in zip(jobs, paths)]
+    todo = [i for i, r in enumerate(results) if r is None]
+
+    # leagues are independent fits: one worker each, only the pre-sliced arrays are pickled
+    fitted = Parallel(n_jobs=-1, backend="loky")(delayed(_one_league)(*jobs[i][:6]) for i in todo)
+    for i, (lg, imp) in zip(todo, fitted):
+        results[i] = (lg, imp)
+        if isinstance(imp, str):
+            continue   # failures are not cached; retried next run
         try:
-            model = LogisticRegression(max_iter=200, solver="lbfgs")
-            model.fit(X_tr, y_tr)
-            pi = permutation_importance(model, X_te, y_te, n_repeats=5, random_state=42)
-            imp = pd.DataFrame({"feature": Xcols, "mean": pi.importances_mean, "std": pi.importances_std})
-            imp = imp.sort_values("mean", ascending=False)
-            top = imp.head(15)
-            bottom = imp.tail(10)
-
-            lines += [f"## {lg}", "", "### Top 15 features"]
-            for _, r in top.iterrows():
-                lines.append(f"- {r['feature']}: {r['mean']:.4f} ± {r['std']:.4f}")
-            lines += ["", "### Bottom 10 features"]
-            for _, r in bottom.iterrows():
-                lines.append(f"- {r['feature']}: {r['mean']:.4f} ± {r['std']:.4f}")
-            lines.append("")
+            imp.to_parquet(paths[i], index=False)
         except Exception as e:
-            lines += [f"## {lg}", "", f"- Importance computation failed: {e}", ""]
+            print(f"[WARN] importance cache write skipped for {lg}: {e}")
+    print(f"feature_importance_report: {len(jobs) - len(todo)} cached, {len(todo)} fitted leagues")
+
+    lines = ["# FEATURE IMPORTANCE", "", f"_Generated: {datetime.utcnow().isoformat()}Z_", ""]
+    for (lg, imp), job in zip(results, jobs):   # Parallel preserves input order → stable, league-sorted report
+        dropped = job[-1]
+        skipped = [f"- Skipped {len(dropped)} constant/empty columns: {', '.join(dropped)}", ""] if dropped else []
+        if isinstance(imp, str):
+            lines += [f"## {lg}", "", *skipped, f"- Importance computation failed: {imp}", ""]
+            continue
+        top = imp.head(15)
+        bottom = imp.tail(10)
+
+        lines += [f"## {lg}", "", *skipped, "### Top 15 features"]
+        for _, r in top.iterrows():
+            lines.append(f"- {r['feature']}: {r['mean']:.4f} ± {r['std']:.4f}")
+        lines += ["", "### Bottom 10 features"]
+        for _, r in bottom.iterrows():
+            lines.append(f"- {r['feature']}: {r['mean']:.4f} ± {r['std']:.4f}")
+        lines.append("")
 
     if len(lines) <= 4:
         return False
@@ -41,11 +41,40 @@ def safe_read(path):
     except Exception:
         return pd.DataFrame()
 
-def mk_id(r):
-    d = str(r.get("date","NA")).replace("-","").replace("T","_").replace(":","")
-    h = str(r.get("home_team","NA")).strip().lower().replace(" ","_")
-    a = str(r.get("away_team","NA")).strip().lower().replace(" ","_")
-    return f"{d}__{h}__vs__{a}"
+DATE_ID_TABLE = str.maketrans({"-": None, ":": None, "T": "_"})
+
+def mk_ids(df):
+    """date__home__vs__away for every row with vectorized string ops (a missing column reads as "NA")."""
+    part = lambda c: df[c].astype(str) if c in df.columns else pd.Series("NA", index=df.index)
+    slug = lambda s: s.str.strip().str.lower().str.replace(" ", "_", regex=False)
+    return part("date").str.translate(DATE_ID_TABLE) + "__" + slug(part("home_team")) + "__vs__" + slug(part("away_team"))
+
+# (feature, home column, away column) -> feature = home - away, in output column order
+DIFF_SPEC = [
+    # core
+    ("spi_rank_diff",              "home_spi_rank",          "away_spi_rank"),
+    ("injury_index_diff",          "home_injury_index",      "away_injury_index"),
+    ("availability_diff",          "home_avail",             "away_avail"),
+    # SPI uncertainty
+    ("spi_ci_width_diff",          "home_spi_ci_width",      "away_spi_ci_width"),
+    # lineups depth
+    ("exp_starters_pct_diff",      "home_exp_starters_pct",  "away_exp_starters_pct"),
+    # FBref keeper / passing, GCA/SCA, defensive actions, set pieces
+    ("keeper_psxg_prevented_diff", "home_gk_psxg_prevented", "away_gk_psxg_prevented"),
+    ("passing_accuracy_diff",      "home_pass_pct",          "away_pass_pct"),
+    ("sca90_diff",                 "home_sca90",             "away_sca90"),
+    ("gca90_diff",                 "home_gca90",             "away_gca90"),
+    ("pressures90_diff",           "home_pressures90",       "away_pressures90"),
+    ("tackles90_diff",             "home_tackles90",         "away_tackles90"),
+    ("setpiece_share_diff",        "home_setpiece_share",    "away_setpiece_share"),
+] + [
+    # rolling form (backward compat; kept if present)
+    (f"last{n}_{k}_diff", f"home_last{n}_{src}", f"away_last{n}_{src}")
+    for n in (5, 10)
+    for k, src in (("gf","goals_for"), ("ga","goals_against"), ("pts","points"))
+]
+# diffs that also pass their home/away levels through (emitted just before the diff)
+DIFF_LEVELS = {"spi_ci_width_diff": ("spi_ci_width_home", "spi_ci_width_away")}
 
 def num(s):
     """Coerce Series or ndarray to numeric; pass-through for missing."""
@@ -62,64 +91,21 @@ def main():
         return
 
     if "fixture_id" not in up.columns:
-        up["fixture_id"] = up.apply(mk_id, axis=1)
+        up["fixture_id"] = mk_ids(up)
 
     feats = pd.DataFrame({"fixture_id": up["fixture_id"]})
 
-    # ---------- Core diffs ----------
-    if {"home_spi_rank","away_spi_rank"}.issubset(up.columns):
-        feats["spi_rank_diff"] = num(up["home_spi_rank"]) - num(up["away_spi_rank"])
-
-    if {"home_injury_index","away_injury_index"}.issubset(up.columns):
-        feats["injury_index_diff"] = num(up["home_injury_index"]) - num(up["away_injury_index"])
-
-    if {"home_avail","away_avail"}.issubset(up.columns):
-        feats["availability_diff"] = num(up["home_avail"]) - num(up["away_avail"])
-
-    # ---------- SPI uncertainty ----------
-    if {"home_spi_ci_width","away_spi_ci_width"}.issubset(up.columns):
-        feats["spi_ci_width_home"] = num(up["home_spi_ci_width"])
-        feats["spi_ci_width_away"] = num(up["away_spi_ci_width"])
-        feats["spi_ci_width_diff"] = feats["spi_ci_width_home"] - feats["spi_ci_width_away"]
-
-    # ---------- Lineups depth ----------
-    if {"home_exp_starters_pct","away_exp_starters_pct"}.issubset(up.columns):
-        feats["exp_starters_pct_diff"] = num(up["home_exp_starters_pct"]) - num(up["away_exp_starters_pct"])
-
-    # ---------- FBref keeper / passing diffs ----------
-    if {"home_gk_psxg_prevented","away_gk_psxg_prevented"}.issubset(up.columns):
-        feats["keeper_psxg_prevented_diff"] = num(up["home_gk_psxg_prevented"]) - num(up["away_gk_psxg_prevented"])
-
-    if {"home_pass_pct","away_pass_pct"}.issubset(up.columns):
-        feats["passing_accuracy_diff"] = num(up["home_pass_pct"]) - num(up["away_pass_pct"])
-
-    # ---------- GCA/SCA diffs ----------
-    if {"home_sca90","away_sca90"}.issubset(up.columns):
-        feats["sca90_diff"] = num(up["home_sca90"]) - num(up["away_sca90"])
-    if {"home_gca90","away_gca90"}.issubset(up.columns):
-        feats["gca90_diff"] = num(up["home_gca90"]) - num(up["away_gca90"])
-
-    # ---------- Defensive action diffs ----------
-    if {"home_pressures90","away_pressures90"}.issubset(up.columns):
-        feats["pressures90_diff"] = num(up["home_pressures90"]) - num(up["away_pressures90"])
-    if {"home_tackles90","away_tackles90"}.issubset(up.columns):
-        feats["tackles90_diff"] = num(up["home_tackles90"]) - num(up["away_tackles90"])
-
-    # ---------- Set-piece share diff ----------
-    if {"home_setpiece_share","away_setpiece_share"}.issubset(up.columns):
-        feats["setpiece_share_diff"] = num(up["home_setpiece_share"]) - num(up["away_setpiece_share"])
-
-    # ---------- Rolling form (backward compat; keep if present) ----------
-    for n in (5, 10):
-        gf_h = f"home_last{n}_goals_for";    gf_a = f"away_last{n}_goals_for"
-        ga_h = f"home_last{n}_goals_against";ga_a = f"away_last{n}_goals_against"
-        pts_h= f"home_last{n}_points";       pts_a= f"away_last{n}_points"
-        if {gf_h, gf_a}.issubset(up.columns):
-            feats[f"last{n}_gf_diff"] = num(up[gf_h]) - num(up[gf_a])
-        if {ga_h, ga_a}.issubset(up.columns):
-            feats[f"last{n}_ga_diff"] = num(up[ga_h]) - num(up[ga_a])
-        if {pts_h, pts_a}.issubset(up.columns):
-            feats[f"last{n}_pts_diff"] = num(up[pts_h]) - num(up[pts_a])
+    # ---------- Home-minus-away diffs (table-driven, one numeric pass) ----------
+    spec = [(name, h, a) for name, h, a in DIFF_SPEC if {h, a}.issubset(up.columns)]
+    if spec:
+        cols = list(dict.fromkeys(c for _, h, a in spec for c in (h, a)))
+        vals = up[cols].apply(pd.to_numeric, errors="coerce").astype(np.float32)
+        block = {}
+        for name, h, a in spec:
+            for lvl, c in zip(DIFF_LEVELS.get(name, ()), (h, a)):
+                block[lvl] = vals[c]
+            block[name] = vals[h] - vals[a]
+        feats = pd.concat([feats, pd.DataFrame(block, index=up.index)], axis=1)
 
     # ---------- Market & coherence ----------
     if "bookmaker_count" in up.columns:
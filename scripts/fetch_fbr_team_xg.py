@@ -1,4 +1,4 @@
-import os, sys, time, requests, pandas as pd
+import os, sys, time, requests, numpy as np, pandas as pd
 API_KEY=os.environ.get("FBR_API_KEY","").strip(); BASE="https://fbrapi.com"; DATA="data"
 LEAGUE_IDS=[9,12,11,20,13]  # EPL, LaLiga, Serie A, Bundesliga, Ligue 1
 os.makedirs(DATA, exist_ok=True)
@@ -55,18 +55,11 @@ def main():
     for c in ["cur_xg","cur_xga","cur_xgd","cur_xgd90","last_xg","last_xga","last_xgd","last_xgd90"]:
         hybrid[c]=pd.to_numeric(hybrid[c],errors="coerce")
     wcur,wlast=0.60,0.40
-    def w(a,b): 
-        if pd.notna(a) and pd.notna(b): return wcur*a+wlast*b
-        if pd.notna(a): return a
-        if pd.notna(b): return b
-        return None
-    out = pd.DataFrame({
-        "team": hybrid["team"], "league_id": hybrid["league_id"],
-        "xg_hybrid": [w(a,b) for a,b in zip(hybrid["cur_xg"], hybrid["last_xg"])],
-        "xga_hybrid":[w(a,b) for a,b in zip(hybrid["cur_xga"], hybrid["last_xga"])],
-        "xgd_hybrid":[w(a,b) for a,b in zip(hybrid["cur_xgd"], hybrid["last_xgd"])],
-        "xgd90_hybrid":[w(a,b) for a,b in zip(hybrid["cur_xgd90"], hybrid["last_xgd90"])]
-    })
+    def w(m):   # whole columns: 60/40 blend where both seasons exist, else whichever one does (NaN if neither)
+        a,b=hybrid[f"cur_{m}"].to_numpy(dtype=float),hybrid[f"last_{m}"].to_numpy(dtype=float)
+        return np.where(np.isnan(a), b, np.where(np.isnan(b), a, wcur*a+wlast*b))
+    out = pd.DataFrame({"team": hybrid["team"], "league_id": hybrid["league_id"],
+                        **{f"{m}_hybrid": w(m) for m in ["xg","xga","xgd","xgd90"]}})
     out.to_csv(os.path.join(DATA,"xg_metrics_hybrid.csv"),index=False)
     print("[OK] wrote data/xg_metrics_hybrid.csv", len(out))
 if __name__=="__main__": main()
@@ -56,7 +56,7 @@ def main():
     if not cons.empty:
         cons2 = cons[["fixture_id","flag_goals_vs_totals","flag_over_vs_btts"]].copy() if set(["flag_goals_vs_totals","flag_over_vs_btts"]).issubset(cons.columns) else pd.DataFrame()
         if not cons2.empty:
-            cons2["consistency_flag"] = cons2[["flag_goals_vs_totals","flag_over_vs_btts"]].fillna(0).astype(int).max(axis=1)
+            cons2["consistency_flag"] = cons2[["flag_goals_vs_totals","flag_over_vs_btts"]].fillna(0).astype("int8").max(axis=1)
             cons2 = cons2[["fixture_id","consistency_flag"]]
             base = base.merge(cons2, on="fixture_id", how="left")
     if "consistency_flag" not in base.columns:
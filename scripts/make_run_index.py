@@ -51,12 +51,8 @@ def main():
 
     cons = safe_csv("CONSISTENCY_CHECKS.csv")
     if not cons.empty:
-        flags = 0
-        if "flag_goals_vs_totals" in cons.columns:
-            flags += int(cons["flag_goals_vs_totals"].fillna(0).astype(int).sum())
-        if "flag_over_vs_btts" in cons.columns:
-            flags += int(cons["flag_over_vs_btts"].fillna(0).astype(int).sum())
-        idx["consistency_flags"] = int(flags)
+        flag_cols = [c for c in ("flag_goals_vs_totals","flag_over_vs_btts") if c in cons.columns]
+        idx["consistency_flags"] = int(cons[flag_cols].fillna(0).astype("int8").to_numpy().sum())
     else:
         idx["consistency_flags"] = 0
 
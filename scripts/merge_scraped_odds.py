@@ -43,7 +43,7 @@ def load_team_map(path):
     tm = pd.read_csv(path)
     if "raw" not in tm.columns or "canonical" not in tm.columns: return {}
     tm = tm.dropna(subset=["raw","canonical"])
-    return {str(r.raw).strip(): str(r.canonical).strip() for _, r in tm.iterrows()}
+    return dict(zip(tm["raw"].astype(str).str.strip(), tm["canonical"].astype(str).str.strip()))
 
 def apply_team_map(series, name_map):
     return series.apply(lambda x: name_map.get(str(x).strip(), str(x).strip()) if pd.notna(x) else x)
@@ -18,13 +18,16 @@ def load_map(p):
     if not os.path.exists(p): return {}
     m = pd.read_csv(p)
     if {"raw","canonical"}.issubset(m.columns):
-        return {str(r.raw).strip(): str(r.canonical).strip() for _, r in m.iterrows()}
+        return dict(zip(m["raw"].astype(str).str.strip(), m["canonical"].astype(str).str.strip()))
     return {}
 
 def apply_map(df, name_map, cols):
     for c in cols:
         if c in df.columns:
-            df[c] = df[c].astype(str).str.strip().map(lambda x: name_map.get(x, x))
+            # strip/map each distinct raw name once, then broadcast back through the codes
+            codes, uniq = pd.factorize(df[c], use_na_sentinel=False)
+            s = pd.Series(uniq, dtype=object).astype(str).str.strip()
+            df[c] = s.map(name_map).fillna(s).to_numpy()[codes]
     return df
 
 def main():
@@ -39,7 +39,7 @@ def main():
     name_map = {}
     m = safe_read(MAP)
     if not m.empty and {"raw","canonical"}.issubset(m.columns):
-        name_map = {str(r.raw).strip(): str(r.canonical).strip() for _, r in m.iterrows()}
+        name_map = dict(zip(m["raw"].astype(str).str.strip(), m["canonical"].astype(str).str.strip()))
         canon |= set(name_map.values())
 
     # scan sources
@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 
 def read_csv_safe(path: str) -> pd.DataFrame:
@@ -8,4 +9,60 @@ def read_csv_safe(path: str) -> pd.DataFrame:
     return df
 
 def write_csv(df: pd.DataFrame, path: str):
-    df.to_csv(path, index=False)
\ No newline at end of file
+    """Arrow's C++ CSV writer when available (strings come out quoted); pandas otherwise."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+    except ImportError:
+        df.to_csv(path, index=False); return
+    # datetimes as pandas would write them ("YYYY-MM-DD" when time-free), not Arrow's ns timestamps
+    dt_cols = df.select_dtypes(include=["datetime", "datetimetz"]).columns
+    if len(dt_cols):
+        df = df.assign(**{c: df[c].astype(str).where(df[c].notna(), None) for c in dt_cols})
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):   # mixed-type object column
+        df.to_csv(path, index=False); return
+    pcsv.write_csv(table, path, write_options=pcsv.WriteOptions(include_header=True))
+
+def parquet_sidecar(path: str) -> str:
+    """The typed .parquet copy write_table keeps next to a CSV."""
+    return os.path.splitext(path)[0] + ".parquet"
+
+def read_fresh_parquet(pq: str, path: str, columns=None):
+    """
+    pq when it exists and is at least as new as the CSV at path; None otherwise (or unreadable).
+    columns (names or a predicate on names) reads just those parquet columns.
+    """
+    if not (os.path.exists(pq) and os.path.exists(path) and os.path.getmtime(pq) >= os.path.getmtime(path)):
+        return None
+    try:
+        if columns is None:
+            return pd.read_parquet(pq)
+        import pyarrow.parquet as pqt
+        keep = columns if callable(columns) else set(columns).__contains__
+        return pd.read_parquet(pq, columns=[c for c in pqt.read_schema(pq).names if keep(c)])
+    except Exception:
+        return None   # unreadable copy: re-parse the CSV
+
+def read_table(path: str, columns=None, read_csv=None) -> pd.DataFrame:
+    """
+    A table written by write_table: its parquet sidecar when fresh (typed, no re-parse), else the CSV.
+    columns (names or predicate, absent names ignored) limits either read; read_csv(path, columns)
+    replaces the default pd.read_csv parse.
+    """
+    df = read_fresh_parquet(parquet_sidecar(path), path, columns)
+    if df is not None:
+        return df
+    if read_csv is not None:
+        return read_csv(path, columns)
+    keep = columns if columns is None or callable(columns) else set(columns).__contains__
+    return pd.read_csv(path, usecols=keep)
+
+def write_table(df: pd.DataFrame, path: str, **parquet_kw):
+    """CSV (the contract for downstream steps) plus a zstd parquet sidecar; a failed sidecar only warns."""
+    write_csv(df, path)
+    try:
+        df.to_parquet(parquet_sidecar(path), engine="pyarrow", compression="zstd", index=False, **parquet_kw)
+    except Exception as e:
+        print(f"[WARN] parquet sidecar skipped: {e}")
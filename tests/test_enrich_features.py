@@ -0,0 +1,113 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+import enrich_features as ef
+import fbref_merge_slices
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return tmp_path / "data"
+
+
+def test_line_moves_when_up_is_built_from_fixtures(data_dir):
+    # no enriched file yet: up = fx.copy() already carries every odds field, so nothing is merged
+    pd.DataFrame({
+        "date": ["2025-01-04", "2025-01-05"],
+        "league": ["EPL", "EPL"],
+        "fixture_id": ["f1", "f2"],
+        "home_team": ["Arsenal", "Everton"],
+        "away_team": ["Chelsea", "Fulham"],
+        "ou_over_price": [1.9, np.nan],
+        "open_ou_total": [2.5, 3.0],
+        "close_ou_total": [2.75, 2.5],
+        "open_home_odds": [2.1, 3.4],
+        "close_home_odds": [1.9, 3.6],
+        "open_spread_home_line": [-0.5, 0.25],
+        "close_spread_home_line": [-0.75, 0.5],
+    }).to_csv(data_dir / "UPCOMING_fixtures.csv", index=False)
+
+    ef.main([])
+    out = pd.read_csv(data_dir / "UPCOMING_7D_enriched.csv").set_index("fixture_id").loc[["f1", "f2"]]
+
+    np.testing.assert_allclose(out["ou_move"], [0.25, -0.5], atol=1e-6)
+    np.testing.assert_allclose(out["h2h_home_move"], [-0.2, 0.2], atol=1e-6)
+    np.testing.assert_allclose(out["spread_home_line_move"], [-0.25, 0.25], atol=1e-6)
+    assert "h2h_away_move" not in out.columns
+    assert out["has_ou"].tolist() == [1, 0]
+
+
+def test_fbref_combined_mode_matches_slice_mode_across_seasons(data_dir):
+    pd.DataFrame({
+        "date": ["2025-01-04"], "league": ["EPL"], "fixture_id": ["f1"],
+        "home_team": ["Arsenal"], "away_team": ["Chelsea"],
+    }).to_csv(data_dir / "UPCOMING_fixtures.csv", index=False)
+    # slice CSVs list the current season first; combined rows come out oldest season first
+    pd.DataFrame({
+        "team": ["Arsenal", "Chelsea", "Arsenal"], "league": ["EPL"] * 3,
+        "season": ["2024-2025", "2024-2025", "2023-2024"], "Cmp%": [80.0, 70.0, 50.0],
+    }).to_csv(data_dir / "fbref_slice_passing.csv", index=False)
+    pd.DataFrame({
+        "team": ["Arsenal", "Chelsea"], "league": ["EPL"] * 2,
+        "season": ["2024-2025", "2023-2024"], "sca90": [3.0, 2.5], "gca90": [2.0, 1.5],
+    }).to_csv(data_dir / "fbref_slice_goal_shot_creation.csv", index=False)
+    pd.DataFrame({
+        "team": ["Chelsea"], "league": ["EPL"], "season": ["2022-2023"], "tackles/90": [15.0],
+    }).to_csv(data_dir / "fbref_slice_defense.csv", index=False)
+    fbref_merge_slices.main()
+
+    feats = [f"{side}_{f}" for _, f, _ in ef.SLICE_FEATURES for side in ("home", "away")]
+    outs = {}
+    for mode in ("slice", "combined"):
+        for f in ("UPCOMING_7D_enriched.csv", "UPCOMING_7D_enriched.parquet"):
+            (data_dir / f).unlink(missing_ok=True)
+        ef.main(["--fbref-mode", mode])
+        outs[mode] = pd.read_csv(data_dir / "UPCOMING_7D_enriched.csv")[feats]
+
+    pd.testing.assert_frame_equal(outs["combined"], outs["slice"])
+    row = outs["combined"].iloc[0]
+    assert (row["home_pass_pct"], row["away_pass_pct"]) == (80.0, 70.0)
+    assert (row["home_sca90"], row["away_sca90"], row["home_gca90"]) == (3.0, 2.5, 2.0)
+    assert row["away_tackles90"] == 15.0 and np.isnan(row["home_tackles90"])
+
+
+def test_side_inputs_cached_and_projected(data_dir):
+    pd.DataFrame({"team": ["Arsenal", "Chelsea"], "rank": [1, 4], "spi_ci_width": [3.0, 5.0],
+                  "unused": ["x", "y"]}).to_csv(data_dir / "sd_538_spi.csv", index=False)
+
+    # a usecols read still caches the whole table, so a later run can read any subset from parquet
+    miss = ef.safe_read(str(data_dir / "sd_538_spi.csv"), usecols=ef.SPI_COLS)
+    cached = data_dir / ".cache" / "sd_538_spi.csv.parquet"
+    assert cached.exists()
+    assert list(pd.read_parquet(cached).columns) == ["team", "rank", "spi_ci_width", "unused"]
+    hit = ef.safe_read(str(data_dir / "sd_538_spi.csv"), usecols=ef.SPI_COLS)
+    pd.testing.assert_frame_equal(hit, miss)
+    assert list(hit.columns) == ["team", "rank", "spi_ci_width"]
+
+
+def test_cards_corners_priors_use_latest_season(data_dir):
+    pd.DataFrame({
+        "date": ["2025-01-04"], "league": ["EPL"], "fixture_id": ["f1"],
+        "home_team": ["Arsenal"], "away_team": ["Chelsea"], "referee": ["M. Oliver"],
+    }).to_csv(data_dir / "UPCOMING_fixtures.csv", index=False)
+    # ref_cards_corners_build.py output: groupby(league, team, season), oldest season first
+    pd.DataFrame({
+        "league": ["EPL"] * 4, "team": ["Arsenal", "Chelsea", "Arsenal", "Chelsea"],
+        "season": [2023, 2023, 2025, 2025],
+        "avg_cards": [1.0, 1.5, 3.0, 3.5], "avg_corners": [4.0, 4.5, 6.0, 6.5],
+        "referee": ["M. Oliver"] * 4, "ref_avg_cards": [2.0, 2.0, 4.0, 4.0],
+    }).to_csv(data_dir / "ref_cards_corners.csv", index=False)
+
+    ef.main([])
+    row = pd.read_csv(data_dir / "UPCOMING_7D_enriched.csv").iloc[0]
+
+    assert (row["home_avg_cards"], row["away_avg_cards"]) == (3.0, 3.5)
+    assert (row["home_avg_corners"], row["away_avg_corners"]) == (6.0, 6.5)
+    assert row["ref_avg_cards"] == 4.0